@@ -0,0 +1,47 @@
+import bz2
+import gzip
+import os
+import zipfile
+
+# Compressed hand histories read by the bulk import. Every member of a zip archive, or the single
+# file of a gzip or bzip2 archive (named like the archive without its extension), is imported
+# as a file of its own. Members are decompressed while they are read.
+EXTENSIONS = (".zip", ".gz", ".bz2")
+
+def is_archive(path):
+    return path.lower().endswith(EXTENSIONS)
+
+def list_members(path):
+    if path.lower().endswith(".zip"):
+        with zipfile.ZipFile(path) as archive:
+            return [info.filename for info in archive.infolist() if not info.is_dir()]
+
+    return [os.path.splitext(os.path.basename(path))[0]]
+
+def open_member(path, member):
+    # Binary stream of the decompressed member, seek works by decompressing up to the offset
+    lower = path.lower()
+
+    if lower.endswith(".zip"):
+        archive = zipfile.ZipFile(path)
+
+        try:
+            return archive.open(member)
+        finally:
+            # The member stream keeps the archive file open until it is closed
+            archive.close()
+
+    if lower.endswith(".gz"):
+        return gzip.open(path, "rb")
+
+    return bz2.open(path, "rb")
+
+def get_member_size(path, member):
+    # Decompressed size of the member, None when it can't be known without decompressing it.
+    # gzip and bzip2 archives don't record it: the gzip trailer only holds the size of the last
+    # member modulo 2^32, the size read is recorded by the import instead
+    if path.lower().endswith(".zip"):
+        with zipfile.ZipFile(path) as archive:
+            return archive.getinfo(member).file_size
+
+    return None
@@ -1,5 +1,5 @@
 import codecs
-import logging, logging.config
+import logging, logging.config, logging.handlers
 import os
 import shutil
 import sys
@@ -47,10 +47,24 @@ def set_log_file(file_name):
 
     try:
         print(f"Using logging configfile: {conf_file}")
-        logging.config.fileConfig(conf_file, {"logFile": log_file})
+        # Called by the __main__ block of the scripts, the loggers of the modules exist already
+        logging.config.fileConfig(conf_file, {"logFile": log_file}, disable_existing_loggers=False)
     except Exception as e:
         sys.stderr.write(f"Could not setup log file {file_name}: {e}")
 
+def set_metrics_file(file_name):
+    # The import metrics go to their own rolling file, not to the log
+    metrics_log = logging.getLogger("metrics")
+    metrics_log.propagate = False
+    metrics_log.setLevel(logging.INFO)
+
+    try:
+        handler = logging.handlers.RotatingFileHandler(os.path.join(LOG_PATH, file_name), "a", 2000000, 5)
+        handler.setFormatter(logging.Formatter("%(asctime)s - %(message)s"))
+        metrics_log.addHandler(handler)
+    except Exception as e:
+        sys.stderr.write(f"Could not setup metrics file {file_name}: {e}")
+
 def check_dir(path):
     # Check if a dir exists, creates if not.
     if not os.path.exists(path):
@@ -112,6 +126,12 @@ class Import(object):
     def __init__(self, node):
         self.interval = int(node.getAttribute("interval"))
         self.session_timeout = int(node.getAttribute("session_timeout"))
+        self.workers = int(node.getAttribute("workers") or 1)  # bulk import parser processes, 0 = one per cpu
+        self.bulk_load_max_hands = int(node.getAttribute("bulk_load_max_hands") or 0)  # 0 = no bulk-load mode
+        self.cache_preload_rows = int(node.getAttribute("cache_preload_rows") or 0)  # rows of each table read into the id caches, 0 = none
+        self.player_cache_size = int(node.getAttribute("player_cache_size") or 100000)  # player ids kept by Database
+        self.tourney_cache_size = int(node.getAttribute("tourney_cache_size") or 10000)  # tourney ids kept by Database
+        self.integer_money = bool(int(node.getAttribute("integer_money") or 0))  # money columns of new tables are INTEGER, see Database
 
 class HudUI(object):
     def __init__(self, node):
@@ -1,9 +1,12 @@
+from cachetools import LRUCache
 from decimal import Decimal
 import logging
+from operator import attrgetter
 import os
 import sqlalchemy.pool as pool
 import sys
-from time import sleep
+from time import sleep, time
+from urllib.request import pathname2url
 
 from Exceptions import FpdbError
 import SQL
@@ -130,6 +133,102 @@ CACHE_KEYS = [
     "street3CheckRaiseDone"
 ]
 
+# Values of a DerivedStats.PlayerStats as a tuple, the HandPlayers columns and the HudCache deltas
+# without "n" (1 for every hand)
+get_hand_players_row = attrgetter(*HAND_PLAYERS_KEYS)
+get_cache_row = attrgetter(*CACHE_KEYS[1:])
+
+def select_hand_nos(cursor, sql, hand_nos):
+    # Queried in chunks to stay below the sqlite limit on bound variables
+    result = set()
+    hand_nos = list(hand_nos)
+
+    for i in range(0, len(hand_nos), 500):
+        chunk = hand_nos[i : i + 500]
+        q = sql.query["getHandNos"].replace("<handNos>", ", ".join(["?"] * len(chunk)))
+        cursor.execute(q, chunk)
+        result.update(row[0] for row in cursor.fetchall())
+
+    return result
+
+def process_running_since(pid, start_time):
+    # True when the process pid is running and was started before start_time (seconds since the epoch),
+    # so a pid reused by a process started later doesn't count
+    if sys.platform == "win32":
+        import pywintypes
+        import win32api
+        import win32con
+        import win32process
+
+        try:
+            handle = win32api.OpenProcess(win32con.PROCESS_QUERY_INFORMATION, False, pid)
+        except pywintypes.error:
+            return False
+
+        try:
+            if win32process.GetExitCodeProcess(handle) != 259:  # STILL_ACTIVE
+                return False
+
+            return win32process.GetProcessTimes(handle)["CreationTime"].timestamp() <= start_time
+        finally:
+            handle.Close()
+
+    # Elsewhere only whether the pid is running, a reused pid isn't detected
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+
+    return True
+
+class HandsReader(object):
+    # Read only connection opened in the bulk import parser processes,
+    # only used to find the hands which are already stored
+    def __init__(self, db_path):
+        import sqlite3
+
+        self.sql = SQL.Sql()
+        self.connection = sqlite3.connect(f"file:{pathname2url(db_path)}?mode=ro", uri=True)
+        self.cursor = self.connection.cursor()
+
+    def get_duplicate_hands(self, hand_nos):
+        return select_hand_nos(self.cursor, self.sql, hand_nos)
+
+    def close(self):
+        self.connection.close()
+
+# Size of the game type and tourney type id caches, these tables stay small
+TYPE_CACHE_SIZE = 1000
+
+class IdCache(LRUCache):
+    # Id cache dropping the least recently used ids, with counters for get_cache_stats
+    def __init__(self, maxsize):
+        super().__init__(maxsize)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def lookup(self, key):
+        # Returns the cached id, None if it isn't cached
+        if key in self:
+            self.hits += 1
+            return self[key]
+
+        self.misses += 1
+        return None
+
+    def popitem(self):
+        # Called by LRUCache when the cache is full
+        self.evictions += 1
+        return super().popitem()
+
+    def clear(self):
+        # Not counted as evictions
+        while self:
+            super().popitem()
+
 class Database(object):
     def __init__(self, config):
         self.database = config.database
@@ -137,14 +236,23 @@ class Database(object):
         self.hero_name = config.site.screen_name
         self.day_start = config.general.day_start
         self.session_timeout = config.imp.session_timeout
+        self.cache_preload_rows = config.imp.cache_preload_rows
+        self.player_cache_size = config.imp.player_cache_size
+        self.tourney_cache_size = config.imp.tourney_cache_size
+        self.new_integer_money = config.imp.integer_money  # money columns of the tables made by create_tables
+        self.integer_money = self.new_integer_money  # money columns of the open database, set by connect
         self.sql = SQL.Sql()
         self.connection = None
         self.is_connected = False
         self.cursor = None
-        self.gt_cache = {}  # GameTypeId cache
-        self.t_cache = {}  # TourneyId cache
-        self.p_cache = {}  # PlayerId cache
-        self.tt_cache = {} # TourneyTypeId cache
+        self.gt_cache = IdCache(TYPE_CACHE_SIZE)  # GameTypeId cache
+        self.t_cache = IdCache(self.tourney_cache_size)  # TourneyId cache
+        self.p_cache = IdCache(self.player_cache_size)  # PlayerId cache
+        self.tt_cache = IdCache(TYPE_CACHE_SIZE) # TourneyTypeId cache
+        self.schema_version = None  # checked by check_cache
+        self.hud_cache_deltas = {}  # HudCache rows waiting for flush_hud_cache
+        self.bulk_hand_nos = None  # Hand numbers stored, only kept in bulk-load mode
+        self.commit_retries = 0  # failed commit attempts, reported in the import metrics
 
         # Connect to db
         self.connect()
@@ -163,10 +271,92 @@ class Database(object):
             self.cursor.execute("PRAGMA temp_store=2")  # use memory for temp tables/indexes
             self.cursor.execute("PRAGMA journal_mode=WAL")  # use memory for temp tables/indexes
             self.cursor.execute("PRAGMA synchronous=0")  # don't wait for file writes to finish
+            self.integer_money = self.get_integer_money()
+            self.upgrade_tables()
+            self.preload_cache()
             log.info(f"Connected to SQLite: {self.db_path}")
         else:
             raise FpdbError(f"SQLite database {self.database} does not exists")
 
+    def get_integer_money(self):
+        # The money columns are INTEGER (amounts in cents, chips in tournaments) or REAL. A database
+        # without tables gets the configured type when they're created
+        self.cursor.execute(self.sql.query["getHandPlayersColumns"])
+        types = {row[1]: row[2] for row in self.cursor.fetchall()}
+
+        if not types:
+            return self.new_integer_money
+
+        return types["startStack"].upper() == "INTEGER"
+
+    def money(self, value, units=100):
+        # Value as stored in the money columns: unchanged when they're REAL, an exact int number
+        # of 1/units otherwise (cents by default, 1 for tournament chips)
+        if value is None or not self.integer_money:
+            return value
+
+        result = Decimal(value) * units
+
+        if result != int(result):
+            raise FpdbError(f"Amount {value} can't be stored as an integer number of 1/{units}")
+
+        return int(result)
+
+    def from_money(self, value):
+        # Currency value of a stored amount, for display
+        return value / 100 if self.integer_money else value
+
+    def upgrade_tables(self):
+        # Adds the columns and tables missing in a database created by an older version
+        self.cursor.execute(self.sql.query["getFilesColumns"])
+        columns = [row[1] for row in self.cursor.fetchall()]
+
+        added = False
+
+        for column, query in [("byteOffset", "addFilesByteOffset"), ("fileSize", "addFilesFileSize"),
+                              ("fileMtime", "addFilesFileMtime"), ("prefixHash", "addFilesPrefixHash")]:
+            if columns and column not in columns:
+                log.info(f"Adding {column} to the Files table")
+
+                self.cursor.execute(self.sql.query[query])
+                added = True
+
+        self.cursor.execute(self.sql.query["listTables"])
+        tables = [row[0] for row in self.cursor.fetchall()]
+
+        if columns and "PendingSummaries" not in tables:
+            log.info("Creating the PendingSummaries table")
+
+            self.cursor.execute(self.sql.query["createPendingSummariesTable"].replace("<money>", self.get_money_type()))
+            added = True
+
+        if columns and "BulkLoads" not in tables:
+            log.info("Creating the BulkLoads table")
+
+            self.cursor.execute(self.sql.query["createBulkLoadsTable"])
+            added = True
+
+        if "Hands" in tables:
+            self.cursor.execute(self.sql.query["listIndexes"])
+            indexes = [row[0] for row in self.cursor.fetchall()]
+
+            if "UK_Hands" not in indexes or "UK_HandPlayers" not in indexes:
+                # Dropped by a bulk-load, rebuilt only when the process which runs it is gone
+                self.cursor.execute(self.sql.query["getBulkLoad"])
+                marker = self.cursor.fetchone()
+
+                if marker and process_running_since(*marker):
+                    log.info(f"Bulk-load running in process {marker[0]}, its indexes are left to it")
+                else:
+                    log.warning("Rebuilding the indexes of an interrupted bulk-load")
+
+                    self.create_bulk_load_indexes()
+                    self.cursor.execute(self.sql.query["deleteBulkLoads"])
+                    added = True
+
+        if added:
+            self.commit()
+
     def commit(self):
         # sqlite commits can fail because of shared locks on the database (SQLITE_BUSY)
         # re-try commit if it fails in case this happened
@@ -180,6 +370,7 @@ class Database(object):
                 ok = True
             except Exception as e:
                 log.info(f"Commit {i} failed: info={sys.exc_info()} value={e}")
+                self.commit_retries += 1
                 sleep(pause)
 
             if ok:
@@ -189,6 +380,19 @@ class Database(object):
             log.error("Commit failed")
             raise FpdbError("SQLite commit failed")
 
+    def rollback(self):
+        self.connection.rollback()
+
+    # Savepoints nest inside the open transaction, commit writes what wasn't rolled back
+    def savepoint(self, name):
+        self.cursor.execute(self.sql.query["savepoint"].replace("<name>", name))
+
+    def rollback_to_savepoint(self, name):
+        self.cursor.execute(self.sql.query["rollbackToSavepoint"].replace("<name>", name))
+
+    def release_savepoint(self, name):
+        self.cursor.execute(self.sql.query["releaseSavepoint"].replace("<name>", name))
+
     def disconnect(self):
         self.cursor.close()
         self.connection.close()
@@ -252,10 +456,59 @@ class Database(object):
         return stat_dict
 
     def reset_cache(self):
-        self.gt_cache = {}
-        self.t_cache = {}
-        self.p_cache = {}
-        self.tt_cache = {}
+        # The counters of the caches are kept
+        self.gt_cache.clear()
+        self.t_cache.clear()
+        self.p_cache.clear()
+        self.tt_cache.clear()
+
+    def get_cache_stats(self):
+        # {name: (size, maxsize, hits, misses, evictions)} of the id caches since the connection opened
+        caches = {"players": self.p_cache, "game types": self.gt_cache, "tourney types": self.tt_cache, "tourneys": self.t_cache}
+
+        return {name: (len(c), c.maxsize, c.hits, c.misses, c.evictions) for name, c in caches.items()}
+
+    def preload_cache(self):
+        # Warm start of the id caches: the newest cache_preload_rows rows of Players, GameTypes
+        # and Tourneys are read at once. The rows inserted later by other processes are found by
+        # the SELECT done on a cache miss. tt_cache isn't preloaded, insert_tourney_type takes the
+        # type of an existing tourney first so the stored rows don't give its keys
+        self.reset_cache()
+
+        self.cursor.execute(self.sql.query["getSchemaVersion"])
+        self.schema_version = self.cursor.fetchone()[0]
+
+        self.cursor.execute(self.sql.query["listTables"])
+        tables = [row[0] for row in self.cursor.fetchall()]
+
+        if self.cache_preload_rows <= 0 or "Players" not in tables:
+            return
+
+        # The rows come newest first, they're cached in reverse so the newest are the most recently used
+        self.cursor.execute(self.sql.query["getPlayersCache"], [min(self.cache_preload_rows, self.p_cache.maxsize)])
+        self.p_cache.update(reversed(self.cursor.fetchall()))
+
+        # Same keys as get_game_type_id, the blinds are stored as REAL or integer_money ints
+        self.cursor.execute(self.sql.query["getGameTypesCache"], [min(self.cache_preload_rows, self.gt_cache.maxsize)])
+
+        for type, currency, sb, bb, max_seats, ante, id in reversed(self.cursor.fetchall()):
+            if not self.integer_money:
+                sb, bb = Decimal(str(sb)), Decimal(str(bb))
+
+            self.gt_cache[(type, currency, sb, bb, max_seats, ante)] = id
+
+        self.cursor.execute(self.sql.query["getTourneysCache"], [min(self.cache_preload_rows, self.t_cache.maxsize)])
+        self.t_cache.update(reversed(self.cursor.fetchall()))
+
+        log.info(f"Id caches preloaded: {len(self.p_cache)} players, {len(self.gt_cache)} game types, {len(self.t_cache)} tourneys")
+
+    def check_cache(self):
+        # The cached ids are only valid as long as the tables aren't recreated, by this process
+        # or another one. Any schema change (bulk-load indexes included) reloads them
+        self.cursor.execute(self.sql.query["getSchemaVersion"])
+
+        if self.cursor.fetchone()[0] != self.schema_version:
+            self.preload_cache()
 
     def get_last_insert_id(self):
         return self.cursor.lastrowid
@@ -263,22 +516,24 @@ class Database(object):
     def recreate_tables(self):
         self.drop_tables()
         self.reset_cache()
+        self.integer_money = self.new_integer_money
         self.create_tables()
 
         log.info("Finished recreating tables")
 
+    def get_money_type(self):
+        return "INTEGER" if self.integer_money else "REAL"
+
+    def get_money_unit(self):
+        # Divisor of the stored amounts in the stats queries, see from_money
+        return "100.0" if self.integer_money else "1.0"
+
     def create_tables(self):
-        log.debug("Creating tables")
-
-        self.cursor.execute(self.sql.query["createFilesTable"])
-        self.cursor.execute(self.sql.query["createGameTypesTable"])
-        self.cursor.execute(self.sql.query["createPlayersTable"])
-        self.cursor.execute(self.sql.query["createTourneyTypesTable"])
-        self.cursor.execute(self.sql.query["createTourneysTable"])
-        self.cursor.execute(self.sql.query["createHandsTable"])
-        self.cursor.execute(self.sql.query["createHandPlayersTable"])
-        self.cursor.execute(self.sql.query["createHandActionsTable"])
-        self.cursor.execute(self.sql.query["createHudCacheTable"])
+        log.debug(f"Creating tables, money columns are {self.get_money_type()}")
+
+        for table in ["Files", "GameTypes", "Players", "TourneyTypes", "Tourneys", "Hands", "HandPlayers",
+                      "HandActions", "HudCache", "PendingSummaries", "BulkLoads"]:
+            self.cursor.execute(self.sql.query[f"create{table}Table"].replace("<money>", self.get_money_type()))
 
         log.debug("Creating unique indexes")
 
@@ -304,76 +559,62 @@ class Database(object):
 
     def insert_hand(self, data):
         self.cursor.execute(self.sql.query["insertHand"], data)
-        return self.get_last_insert_id()
 
-    def insert_hand_player(self, data):
-        self.cursor.execute(self.sql.query["insertHandPlayer"], data)
-        return self.get_last_insert_id()
+        if self.bulk_hand_nos is not None:
+            self.bulk_hand_nos.add(data[1])  # handNo, see insertHand
 
-    def store_hand_players(self, hand_id, players_ids, hand_players):
-        for player in hand_players:
-            player_stats = hand_players.get(player)
-            data = [hand_id, players_ids[player]]
-            data += [player_stats[s] for s in HAND_PLAYERS_KEYS]
-            self.insert_hand_player(data)
-
-    def insert_hand_action(self, data):
-        self.cursor.execute(self.sql.query["insertHandAction"], data)
         return self.get_last_insert_id()
 
-    def store_hand_actions(self, hand_id, players_ids, hand_actions):
-        for action in hand_actions:
-            data = [
-                    hand_id,
-                    players_ids[hand_actions[action]["player"]],
-                    hand_actions[action]["street"],
-                    hand_actions[action]["action"],
-                    hand_actions[action]["amount"],
-                    hand_actions[action]["allIn"]
-            ]
-            self.insert_hand_action(data)
-
-    def get_hud_cache_id(self, data):
-        self.cursor.execute(self.sql.query["getHudCacheId"], data)
-        result = self.cursor.fetchone()
+    def insert_hand_players(self, data):
+        # data is a list of rows, written with a single executemany
+        self.cursor.executemany(self.sql.query["insertHandPlayer"], data)
 
-        if not result:
-            return 0
-
-        return result[0]
+    def get_hand_players_data(self, hand_id, players_ids, hand_players):
+        return [(hand_id, players_ids[player], *get_hand_players_row(player_stats)) for player, player_stats in hand_players.items()]
 
-    def insert_hud_cache(self, data):
-        self.cursor.execute(self.sql.query["insertHudCache"], data)
-        return self.get_last_insert_id()
+    def insert_hand_actions(self, data):
+        # data is a list of rows, written with a single executemany
+        self.cursor.executemany(self.sql.query["insertHandAction"], data)
 
-    def update_hud_cache(self, data):
-        self.cursor.execute(self.sql.query["updateHudCache"], data)
+    def get_hand_actions_data(self, hand_id, players_ids, hand_actions):
+        # hand_actions are (player, street, action, amount, allIn) rows, see Hand.assemble_hand_actions
+        return [(hand_id, players_ids[player], *action) for player, *action in hand_actions]
 
-    def store_hud_cache(self, game_type_id, players_ids, hand_players):
+    def add_hud_cache(self, game_type_id, players_ids, hand_players):
+        # The HudCache deltas are summed in memory per (gameTypeId, playerId, seats),
+        # flush_hud_cache writes them
         seats = len(players_ids)
 
-        for player in hand_players:
-            player_stats = hand_players.get(player)
-            player_stats["n"] = 1
-            k = [game_type_id, players_ids[player], seats]
-            data = [player_stats[s] for s in CACHE_KEYS]
+        for player, player_stats in hand_players.items():
+            k = (game_type_id, players_ids[player], seats)
+            deltas = self.hud_cache_deltas.get(k)
 
-            cache_id = self.get_hud_cache_id(k)
-
-            if cache_id == 0:
-                self.insert_hud_cache(k + data)
+            if deltas is None:
+                self.hud_cache_deltas[k] = [1, *map(int, get_cache_row(player_stats))]
             else:
-                data += [cache_id]
-                self.update_hud_cache(data)
+                deltas[0] += 1
+
+                for i, value in enumerate(get_cache_row(player_stats), 1):
+                    deltas[i] += value
+
+    def flush_hud_cache(self):
+        # One upsert per distinct key
+        data = [list(k) + deltas for k, deltas in self.hud_cache_deltas.items()]
+        self.hud_cache_deltas = {}
 
-    def get_file_id(self, file):
-        self.cursor.execute(self.sql.query["getFileId"], [file])
+        if data:
+            self.cursor.executemany(self.sql.query["upsertHudCache"], data)
+
+    def get_file(self, file):
+        # Returns the id, the committed byte offset and the fingerprint (size, mtime, prefix hash)
+        # of the file, (0, 0, None, None, None) if it isn't known
+        self.cursor.execute(self.sql.query["getFile"], [file])
         result = self.cursor.fetchone()
 
         if not result:
-            return 0
+            return 0, 0, None, None, None
 
-        return result[0]
+        return tuple(result)
 
     def insert_file(self, data):
         self.cursor.execute(self.sql.query["insertFile"], data)
@@ -386,23 +627,65 @@ class Database(object):
         self.cursor.execute(self.sql.query["getPlayerId"], [self.hero_name])
         return self.cursor.fetchone()[0]
 
-    def is_hand_duplicate(self, hand_no):
-        self.cursor.execute(self.sql.query["getHandId"], [hand_no])
-        result = self.cursor.fetchone()
+    def get_duplicate_hands(self, hand_nos):
+        # Returns the set of the given hand numbers which are already stored
+        if self.bulk_hand_nos is not None:
+            return self.bulk_hand_nos.intersection(hand_nos)
+
+        return select_hand_nos(self.cursor, self.sql, hand_nos)
+
+    def start_bulk_load(self):
+        # Bulk-load mode for first imports: UK_Hands and UK_HandPlayers are dropped and rebuilt by
+        # finish_bulk_load. UK_HudCache is the upsert conflict target and the indexes of the small
+        # tables serve the id lookups, they're kept. Without UK_Hands the duplicate hands are found
+        # with the set of the stored hand numbers.
+        # The BulkLoads marker tells the other connections that the indexes are missing on purpose,
+        # see upgrade_tables
+        log.info("Starting bulk-load mode")
+
+        self.cursor.execute(self.sql.query["getAllHandNos"])
+        self.bulk_hand_nos = set(row[0] for row in self.cursor.fetchall())
+
+        self.cursor.execute(self.sql.query["dropHandsIndex"])
+        self.cursor.execute(self.sql.query["dropHandPlayersIndex"])
+        self.cursor.execute(self.sql.query["deleteBulkLoads"])
+        self.cursor.execute(self.sql.query["insertBulkLoad"], [os.getpid(), time()])
+        self.commit()
 
-        if not result:
-            return False
+    def finish_bulk_load(self):
+        log.info("Rebuilding indexes after bulk-load")
+
+        self.bulk_hand_nos = None
+        self.create_bulk_load_indexes()
+
+        self.cursor.execute(self.sql.query["deleteBulkLoads"])
+        self.cursor.execute("ANALYZE")
+        self.commit()
+
+    def create_bulk_load_indexes(self):
+        # Creates UK_Hands and UK_HandPlayers when they're missing, which also checks that no duplicate was loaded
+        import sqlite3
+
+        try:
+            self.cursor.execute(self.sql.query["createHandsIndex"])
+            self.cursor.execute(self.sql.query["createHandPlayersIndex"])
+        except sqlite3.IntegrityError as e:
+            self.connection.rollback()
+            self.cursor.execute(self.sql.query["getDuplicateHandNos"])
+            hand_nos = [row[0] for row in self.cursor.fetchall()]
 
-        return True
+            raise FpdbError(f"Bulk-load indexes can't be rebuilt: {e}, duplicate hands: {hand_nos}")
 
     def get_players_ids(self, players, hero):
         result = {}
 
         for player in players:
-            if len(self.p_cache) == 0 or player not in self.p_cache:
-                self.p_cache[player] = self.insert_player(player, player == hero)
+            player_id = self.p_cache.lookup(player)
 
-            result[player] = self.p_cache[player]
+            if player_id is None:
+                player_id = self.p_cache[player] = self.insert_player(player, player == hero)
+
+            result[player] = player_id
 
         return result
 
@@ -417,19 +700,24 @@ class Database(object):
         return result[0]
 
     def get_game_type_id(self, game):
+        # Blinds in chips at tournaments, integer_money stores them as they are
+        units = 1 if game["type"] == "tour" else 100
+
         data = (
             game["type"],
             game["currency"],
-            Decimal(game["sb"]),
-            Decimal(game["bb"]),
+            self.money(game["sb"], units) if self.integer_money else Decimal(game["sb"]),
+            self.money(game["bb"], units) if self.integer_money else Decimal(game["bb"]),
             game["maxSeats"],
             int(game["ante"])
         )
 
-        if len(self.gt_cache) == 0 or data not in self.gt_cache:
-            self.gt_cache[data] = self.insert_game_type(data)
+        game_type_id = self.gt_cache.lookup(data)
+
+        if game_type_id is None:
+            game_type_id = self.gt_cache[data] = self.insert_game_type(data)
 
-        return self.gt_cache[data]
+        return game_type_id
 
     def insert_game_type(self, data):
         self.cursor.execute(self.sql.query["getGameTypeId"], data)
@@ -444,20 +732,22 @@ class Database(object):
     def get_tourney_type_id(self, hand):
         data = (
             hand.buy_in_currency,
-            hand.buy_in,
-            hand.fee,
+            self.money(hand.buy_in),
+            self.money(hand.fee),
             hand.game_type["maxSeats"],
             hand.is_ko,
-            hand.ko_bounty,
+            self.money(hand.ko_bounty),
             hand.speed,
             hand.is_private,
             hand.is_sng
         )
 
-        if len(self.tt_cache) == 0 or data not in self.tt_cache:
-            self.tt_cache[data] = self.insert_tourney_type(hand.tour_no, data)
+        tourney_type_id = self.tt_cache.lookup(data)
 
-        return self.tt_cache[data]
+        if tourney_type_id is None:
+            tourney_type_id = self.tt_cache[data] = self.insert_tourney_type(hand.tour_no, data)
+
+        return tourney_type_id
 
     def insert_tourney_type(self, tour_no, data):
         self.cursor.execute(self.sql.query["getTourneyTypeIdFromTourney"], [tour_no])
@@ -485,28 +775,63 @@ class Database(object):
     def get_tourney_id_from_hand(self, hand):
         data = [hand.tourney_type_id, hand.tour_no, None, None, hand.start_time, None, None, 0]
 
-        if len(self.t_cache) == 0 or hand.tour_no not in self.t_cache:
-            self.t_cache[hand.tour_no] = self.insert_tourney(data)
+        tourney_id = self.t_cache.lookup(hand.tour_no)
+
+        if tourney_id is None:
+            tourney_id = self.t_cache[hand.tour_no] = self.insert_tourney(data)
 
-        return self.t_cache[hand.tour_no]
+        return tourney_id
 
     def insert_tourney(self, data):
         result = self.get_tourney_id(data[1])
 
         if result == 0:
             self.cursor.execute(self.sql.query["insertTourney"], data)
-            return self.get_last_insert_id()
+            result = self.get_last_insert_id()
+
+            self.apply_pending_summary(data[1], result)
+
+        return result
+
+    def apply_pending_summary(self, tour_no, tourney_id):
+        # A summary imported before the hands of its tourney is applied when the tourney is created
+        self.cursor.execute(self.sql.query["getPendingSummary"], [tour_no])
+        result = self.cursor.fetchone()
+
+        if result:
+            log.info(f"Applying the pending summary of tourney {tour_no}")
+
+            self.update_tourney([*result, tourney_id])
+            self.cursor.execute(self.sql.query["deletePendingSummary"], [tour_no])
+
+    def insert_pending_summaries(self, data):
+        self.cursor.executemany(self.sql.query["insertPendingSummary"], data)
+
+    def get_tourney_ids(self, tour_nos):
+        # Returns {tourneyNo: id} for the stored tourneys, queried in chunks like select_hand_nos
+        result = {}
+        tour_nos = list(tour_nos)
+
+        for i in range(0, len(tour_nos), 500):
+            chunk = tour_nos[i : i + 500]
+            q = self.sql.query["getTourneyIds"].replace("<tourneyNos>", ", ".join(["?"] * len(chunk)))
+            self.cursor.execute(q, chunk)
+            result.update(self.cursor.fetchall())
 
         return result
 
     def update_tourney(self, data):
         self.cursor.execute(self.sql.query["updateTourney"], data)
 
+    def update_tourneys(self, data):
+        self.cursor.executemany(self.sql.query["updateTourney"], data)
+
     def update_tourney_bounties(self, data):
         self.cursor.execute(self.sql.query["updateTourneyBounties"], data)
 
     def get_tourney_player_detailed_stats(self, start_date, end_date):
-        self.cursor.execute(self.sql.query["getTourneyDetailedStats"], [start_date, end_date])
+        q = self.sql.query["getTourneyDetailedStats"].replace("<moneyUnit>", self.get_money_unit())
+        self.cursor.execute(q, [start_date, end_date])
         return self.cursor.fetchall()
 
     def get_buy_ins(self):
@@ -514,19 +839,19 @@ class Database(object):
         return self.cursor.fetchall()
 
     def get_tourney_player_graph_stats(self, start_date, end_date, tourney_buy_ins):
-        q = self.sql.query["getTourneyGraphStats"]
+        q = self.sql.query["getTourneyGraphStats"].replace("<moneyUnit>", self.get_money_unit())
         q = q.replace("<tourneyBuyIns>", tourney_buy_ins if tourney_buy_ins != "" else "1 = 0")
         self.cursor.execute(q, [start_date, end_date])
         return self.cursor.fetchall()
 
     def get_cash_player_detailed_stats(self, start_date, end_date, stakes):
-        q = self.sql.query["getCashDetailedStats"]
+        q = self.sql.query["getCashDetailedStats"].replace("<moneyUnit>", self.get_money_unit())
         q = q.replace("<stakes>", stakes if stakes != "" else "1 = 0")
         self.cursor.execute(q, [start_date, end_date, self.get_hero_id()])
         return self.cursor.fetchall()
 
     def get_cash_hands_player_detailed_stats(self, start_date, end_date, stakes):
-        q = self.sql.query["getCashHandsDetailedStats"]
+        q = self.sql.query["getCashHandsDetailedStats"].replace("<moneyUnit>", self.get_money_unit())
         q = q.replace("<stakes>", stakes if stakes != "" else "1 = 0")
         self.cursor.execute(q, [start_date, end_date, self.get_hero_id()])
         return self.cursor.fetchall()
@@ -536,13 +861,13 @@ class Database(object):
         return self.cursor.fetchall()
 
     def get_cash_player_graph_stats(self, start_date, end_date, stakes):
-        q = self.sql.query["getCashGraphStats"]
+        q = self.sql.query["getCashGraphStats"].replace("<moneyUnit>", self.get_money_unit())
         q = q.replace("<stakes>", stakes if stakes != "" else "1 = 0")
         self.cursor.execute(q, [start_date, end_date, self.get_hero_id()])
         return self.cursor.fetchall()
 
     def get_cash_player_sessions_stats(self, start_date, end_date, stakes):
-        q = self.sql.query["getCashSessionStats"]
+        q = self.sql.query["getCashSessionStats"].replace("<moneyUnit>", self.get_money_unit())
         q = q.replace("<stakes>", stakes if stakes != "" else "1 = 0")
         self.cursor.execute(q, [start_date, end_date, self.get_hero_id()])
         return self.cursor.fetchall()
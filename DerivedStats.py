@@ -1,51 +1,268 @@
-def stats_initializer():
-    init = {}
-
-    # Init vars that may not be used, but still need to be inserted.
-    init["startBounty"] = None
-    init["endBounty"] = None
-    init["position"] = None
-    init["seatNo"] = None
-    init["card1"] = None
-    init["card2"] = None
-    init["winnings"] = 0
-    init["totalProfit"] = 0
-    init["sawShowdown"] = False
-    init["startingHand"] = None
-    init["street0VPIChance"] = True
-    init["street0VPI"] = False
-    init["street0AggrChance"] = True
-    init["street0Aggr"] = False
-    init["street0TBChance"] = False
-    init["street0TBDone"] = False
-    init["street0FBChance"] = False
-    init["street0FBDone"] = False
-    init["street0FoldTo3BChance"] = False
-    init["street0FoldTo3BDone"] = False
-    init["street0FoldTo4BChance"] = False
-    init["street0FoldTo4BDone"] = False
-    init["raiseToStealChance"] = False
-    init["raiseToStealDone"] = False
-    init["stealChance"] = False
-    init["stealDone"] = False
-    init["foldBBToStealChance"] = False
-    init["foldedBBToSteal"] = False
-    init["foldSBToStealChance"] = False
-    init["foldedSBToSteal"] = False
-    init["wonWhenSeenStreet1"] = False
-
-    for i in range(1, 4):
-        init[f"street{i}Seen"] = False
-        init[f"otherRaisedStreet{i}"] = False
-        init[f"foldToOtherRaisedStreet{i}"] = False
-        init[f"street{i}CBChance"] = False
-        init[f"street{i}CBDone"] = False
-        init[f"foldToStreet{i}CBChance"] = False
-        init[f"foldToStreet{i}CBDone"] = False
-        init[f"street{i}CheckRaiseChance"] = False
-        init[f"street{i}CheckRaiseDone"] = False
-
-    return init
+import Database
+
+class PlayerStats(object):
+    # Stats of a player in a hand, the slots are the HandPlayers columns in the order of
+    # HAND_PLAYERS_KEYS so the database binds them positionally (see Database.get_hand_players_row)
+    __slots__ = Database.HAND_PLAYERS_KEYS
+
+    def __init__(self):
+        # Init vars that may not be used, but still need to be inserted.
+        self.startStack = 0
+        self.startBounty = None
+        self.endBounty = None
+        self.position = None
+        self.seatNo = None
+        self.card1 = None
+        self.card2 = None
+        self.winnings = 0
+        self.totalProfit = 0
+        self.sawShowdown = False
+        self.startingHand = None
+        self.street0VPIChance = True
+        self.street0VPI = False
+        self.street0AggrChance = True
+        self.street0Aggr = False
+        self.street0TBChance = False
+        self.street0TBDone = False
+        self.street0FBChance = False
+        self.street0FBDone = False
+        self.street0FoldTo3BChance = False
+        self.street0FoldTo3BDone = False
+        self.street0FoldTo4BChance = False
+        self.street0FoldTo4BDone = False
+        self.raiseToStealChance = False
+        self.raiseToStealDone = False
+        self.stealChance = False
+        self.stealDone = False
+        self.foldBBToStealChance = False
+        self.foldedBBToSteal = False
+        self.foldSBToStealChance = False
+        self.foldedSBToSteal = False
+        self.wonWhenSeenStreet1 = False
+
+        for i in range(1, 4):
+            setattr(self, f"street{i}Seen", False)
+            setattr(self, f"otherRaisedStreet{i}", False)
+            setattr(self, f"foldToOtherRaisedStreet{i}", False)
+            setattr(self, f"street{i}CBChance", False)
+            setattr(self, f"street{i}CBDone", False)
+            setattr(self, f"foldToStreet{i}CBChance", False)
+            setattr(self, f"foldToStreet{i}CBDone", False)
+            setattr(self, f"street{i}CheckRaiseChance", False)
+            setattr(self, f"street{i}CheckRaiseDone", False)
+
+    # Pickled as the row of values, the parser processes send the hands back
+    def __getstate__(self):
+        return Database.get_hand_players_row(self)
+
+    def __setstate__(self, state):
+        for key, value in zip(self.__slots__, state):
+            setattr(self, key, value)
+
+def calc_stats(hand):
+    # Fills the street, steal, 3-bet, c-bet and check-raise stats of the players in one pass over
+    # the actions, street after street. Needs the positions (Hand.set_positions)
+    stats = hand.hand_players
+
+    # Preflop
+    # VPIP: calls or raises, the big blind has no chance when everybody folds to him
+    # Steal attempt - open raise on positions 1 0 S - i.e. CO, D, SB
+    # Fold to steal - folding blind after steal attemp wo any other callers or raisers
+    # 3-bet/4-bet: bet_level after 3-bet is equal to 3
+    actions = hand.actions[hand.action_streets[1]]
+    p_in = set([x[0] for x in actions])  # players who see the next street
+    tb_in = set(p_in)  # players who can still raise
+    action_cnt = dict.fromkeys(p_in, 0)
+    vpip_made, bb, aggressor = False, None, None
+    bet_level = 1
+    steal_positions = (1, 0, "S")
+    steal_open, steal_attempt = True, False  # steal_open is False once the following actions don't count
+
+    for action in actions:
+        player_name, act = action[0], action[1]
+        player_stats = stats[player_name]
+        aggr = act == "raises"
+        action_cnt[player_name] += 1
+
+        if act in ("calls", "raises"):
+            player_stats.street0VPI = True
+            vpip_made = True
+        elif act == "big blind" and bb is None:
+            bb = player_name
+
+        if act in ("bets", "raises"):
+            player_stats.street0Aggr = True
+            aggressor = player_name
+        elif act == "folds":
+            p_in.discard(player_name)
+
+        if len(tb_in) == 1 and action_cnt[player_name] == 1:
+            player_stats.street0AggrChance = False
+
+        if act == "folds" or (len(action) > 3 and action[-1]):
+            tb_in.discard(player_name)
+
+        if bet_level == 1:
+            if aggr:
+                bet_level += 1
+        elif bet_level == 2:
+            player_stats.street0TBChance = True
+
+            if aggr:
+                player_stats.street0TBDone = True
+                bet_level += 1
+        elif bet_level == 3:
+            player_stats.street0FBChance = True
+            player_stats.street0FoldTo3BChance = True
+
+            if aggr:
+                player_stats.street0FBDone = True
+                bet_level += 1
+            elif act == "folds":
+                player_stats.street0FoldTo3BDone = True
+        elif bet_level == 4:
+            player_stats.street0FoldTo4BChance = True
+
+            if act == "folds":
+                player_stats.street0FoldTo4BDone = True
+
+        if steal_open:
+            position = player_stats.position
+
+            if steal_attempt:
+                if position == "B":
+                    player_stats.foldBBToStealChance = True
+                    player_stats.raiseToStealChance = True
+                    player_stats.foldedBBToSteal = act == "folds"
+                    player_stats.raiseToStealDone = act == "raises"
+                    steal_open = False
+                elif position == "S":
+                    player_stats.foldSBToStealChance = True
+                    player_stats.raiseToStealChance = True
+                    player_stats.foldedSBToSteal = act == "folds"
+                    player_stats.raiseToStealDone = act == "raises"
+                    steal_open = act != "calls"
+
+            if steal_open and position not in steal_positions and act in ("calls", "raises"):
+                steal_open = False
+
+            if steal_open and position in steal_positions and not steal_attempt and act not in ("small blind", "big blind"):
+                player_stats.stealChance = True
+
+                if act == "calls":
+                    steal_open = False
+                elif act == "raises":
+                    steal_attempt = True
+                    player_stats.stealDone = True
+
+    if not vpip_made and bb is not None:
+        stats[bb].street0VPIChance = False
+        stats[bb].street0AggrChance = False
+
+    # Flop, turn and river
+    # Seen: the street is seen by the players who didn't fold, unless one is left, then the
+    # other streets aren't seen either. The players left after the river saw the showdown
+    # Other raised: acted after the first bet or raise of the street
+    # Continuation Bet chance, action:
+    # Had the last bet (initiative) on previous street, got called, close street action
+    # Then no bets before the player with initiatives first action on current street
+    # ie. if player on street-1 had initiative and no donkbets occurred
+    # Fold to c-bet: the players acting until the c-bettor acts again, or someone raises
+    # Check-raise chance: got bet after check, done: checked. got bet. raise
+    for i, street in enumerate(hand.action_streets[2:], 1):
+        if p_in is not None and len(p_in) == 1:
+            p_in = None
+
+        if p_in is not None:
+            for player in p_in:
+                setattr(stats[player], f"street{i}Seen", True)
+
+        first_aggr_made = False
+        folders = []
+        cb_player, aggressor = aggressor, None
+        cb_chance = cb_done = None
+        cb_acts, cb_open, cb_folds = 0, True, {}
+        checkers = set()
+        acted = set()
+        initial_better = None
+
+        for action in hand.actions[street]:
+            player_name, act = action[0], action[1]
+
+            if first_aggr_made:
+                setattr(stats[player_name], f"otherRaisedStreet{i}", True)
+
+            if act in ("bets", "raises"):
+                first_aggr_made = True
+                aggressor = player_name
+            elif act == "folds":
+                folders.append(player_name)
+
+                if p_in is not None:
+                    p_in.discard(player_name)
+
+            if cb_player:
+                if cb_chance is None:
+                    if player_name == cb_player:
+                        cb_chance, cb_done = True, act == "bets"
+                    elif act in ("bets", "raises"):
+                        cb_chance = False
+
+                if cb_open:
+                    if cb_acts > 1:
+                        cb_open = False
+                    elif player_name != cb_player:
+                        cb_folds[player_name] = act == "folds"
+                        cb_open = act != "raises"
+                    else:
+                        cb_acts += 1
+
+            if act == "bets" and initial_better is None:
+                initial_better = player_name
+            elif act == "checks" and initial_better is None:
+                checkers.add(player_name)
+            elif initial_better is not None and player_name in checkers and player_name not in acted:
+                player_stats = stats[player_name]
+                setattr(player_stats, f"street{i}CheckRaiseChance", True)
+                setattr(player_stats, f"street{i}CheckRaiseDone", act == "raises")
+                acted.add(player_name)
+
+        for player_name in folders:
+            player_stats = stats[player_name]
+
+            if getattr(player_stats, f"otherRaisedStreet{i}"):
+                setattr(player_stats, f"foldToOtherRaisedStreet{i}", True)
+
+        if cb_chance:
+            player_stats = stats[cb_player]
+            setattr(player_stats, f"street{i}CBChance", True)
+            setattr(player_stats, f"street{i}CBDone", cb_done)
+
+            if cb_done:
+                for player, folds in cb_folds.items():
+                    setattr(stats[player], f"foldToStreet{i}CBChance", True)
+                    setattr(stats[player], f"foldToStreet{i}CBDone", folds)
+
+    if p_in is not None:
+        for player in p_in:
+            stats[player].sawShowdown = True
+
+# Reference implementation: the stats as they were computed before calc_stats, one pass over the actions
+# per stat. The import doesn't use it, check_derived_stats.py compares it with calc_stats
+def calc_stats_reference(hand):
+    vpip(hand)
+    calc_streets_seen(hand)
+
+    for i in enumerate(hand.action_streets[1:]):
+        aggr(hand, i[0])
+
+        if i[0] > 0:
+            folds(hand, i[0])
+
+    calc_cbets(hand)
+    calc_check_raise(hand)
+    calc_tfbets(hand)
+    calc_steals(hand)
 
 def vpip(hand):
     vpipers = set()
@@ -57,11 +274,11 @@ def vpip(hand):
 
     for player in hand.players:
         if player[1] in vpipers:
-            hand.hand_players[player[1]]["street0VPI"] = True
+            hand.hand_players[player[1]].street0VPI = True
 
     if len(vpipers) == 0 and bb:
-        hand.hand_players[bb[0]]["street0VPIChance"] = False
-        hand.hand_players[bb[0]]["street0AggrChance"] = False
+        hand.hand_players[bb[0]].street0VPIChance = False
+        hand.hand_players[bb[0]].street0AggrChance = False
 
 def calc_streets_seen(hand):
     p_in = set([x[0] for x in hand.actions[hand.action_streets[1]]])
@@ -75,14 +292,14 @@ def calc_streets_seen(hand):
             return
 
         for player in p_in:
-            hand.hand_players[player][f"street{i + 1}Seen"] = True
+            setattr(hand.hand_players[player], f"street{i + 1}Seen", True)
 
         for action in hand.actions[street]:
             if action[1] == "folds":
                 p_in.discard(action[0])
 
     for player in p_in:
-        hand.hand_players[player]["sawShowdown"] = True
+        hand.hand_players[player].sawShowdown = True
 
 def calc_steals(hand):
     # Fills fold(BB|SB)ToSteal(Chance)
@@ -95,20 +312,20 @@ def calc_steals(hand):
     for action in hand.actions[hand.action_streets[1]]:
         player_name, act = action[0], action[1]
         player_stats = hand.hand_players.get(player_name)
-        position = player_stats["position"]
+        position = player_stats.position
 
         if steal_attempt:
             if position == "B":
-                player_stats["foldBBToStealChance"] = True
-                player_stats["raiseToStealChance"] = True
-                player_stats["foldedBBToSteal"] = act == "folds"
-                player_stats["raiseToStealDone"] = act == "raises"
+                player_stats.foldBBToStealChance = True
+                player_stats.raiseToStealChance = True
+                player_stats.foldedBBToSteal = act == "folds"
+                player_stats.raiseToStealDone = act == "raises"
                 break
             elif position == "S":
-                player_stats["foldSBToStealChance"] = True
-                player_stats["raiseToStealChance"] = True
-                player_stats["foldedSBToSteal"] = act == "folds"
-                player_stats["raiseToStealDone"] = act == "raises"
+                player_stats.foldSBToStealChance = True
+                player_stats.raiseToStealChance = True
+                player_stats.foldedSBToSteal = act == "folds"
+                player_stats.raiseToStealDone = act == "raises"
 
                 if act == "calls":
                     break
@@ -117,13 +334,13 @@ def calc_steals(hand):
             break
 
         if position in steal_positions and not steal_attempt and act not in ("small blind", "big blind"):
-            player_stats["stealChance"] = True
+            player_stats.stealChance = True
 
             if act == "calls":
                 break
             elif act == "raises":
                 steal_attempt = True
-                player_stats["stealDone"] = True
+                player_stats.stealDone = True
 
 def calc_tfbets(hand):
     # Fills street0(T|F)B(Chance|Done)
@@ -146,7 +363,7 @@ def calc_tfbets(hand):
 
         if len(p_in) == 1 and action_cnt[player_name] == 1:
             raise_chance = False
-            player_stats["street0AggrChance"] = raise_chance
+            player_stats.street0AggrChance = raise_chance
 
         if act == "folds" or all_in:
             p_in.discard(player_name)
@@ -155,25 +372,25 @@ def calc_tfbets(hand):
             if aggr:
                 bet_level += 1
         elif bet_level == 2:
-            player_stats["street0TBChance"] = True
+            player_stats.street0TBChance = True
 
             if aggr:
-                player_stats["street0TBDone"] = True
+                player_stats.street0TBDone = True
                 bet_level += 1
         elif bet_level == 3:
-            player_stats["street0FBChance"] = True
-            player_stats["street0FoldTo3BChance"] = True
+            player_stats.street0FBChance = True
+            player_stats.street0FoldTo3BChance = True
 
             if aggr:
-                player_stats["street0FBDone"] = True
+                player_stats.street0FBDone = True
                 bet_level += 1
             elif act == "folds":
-                player_stats["street0FoldTo3BDone"] = True
+                player_stats.street0FoldTo3BDone = True
         elif bet_level == 4:
-            player_stats["street0FoldTo4BChance"] = True
+            player_stats.street0FoldTo4BChance = True
 
             if act == "folds":
-                player_stats["street0FoldTo4BDone"] = True
+                player_stats.street0FoldTo4BDone = True
 
 def calc_cbets(hand):
     # Fill streetXCBChance, streetXCBDone, foldToStreetXCBDone, foldToStreetXCBChance 
@@ -190,13 +407,13 @@ def calc_cbets(hand):
 
             if chance:
                 player_stats = hand.hand_players.get(name)
-                player_stats[f"street{i + 1}CBChance"] = True
-                player_stats[f"street{i + 1}CBDone"] = bet_street(hand.actions, hand.action_streets[i + 2], name)
+                setattr(player_stats, f"street{i + 1}CBChance", True)
+                setattr(player_stats, f"street{i + 1}CBDone", bet_street(hand.actions, hand.action_streets[i + 2], name))
 
-                if player_stats[f"street{i + 1}CBDone"]:
+                if getattr(player_stats, f"street{i + 1}CBDone"):
                     for player, folds in list(fold_to_aggressor(hand.actions, street, name).items()):
-                        hand.hand_players[player][f"foldToStreet{i + 1}CBChance"] = True
-                        hand.hand_players[player][f"foldToStreet{i + 1}CBDone"] = folds
+                        setattr(hand.hand_players[player], f"foldToStreet{i + 1}CBChance", True)
+                        setattr(hand.hand_players[player], f"foldToStreet{i + 1}CBDone", folds)
 
 def calc_check_raise(hand):
     # Fill streetXCheckRaiseChance, streetXCheckRaiseDone
@@ -218,8 +435,8 @@ def calc_check_raise(hand):
                 checkers.add(player_name)
             elif initial_better is not None and player_name in checkers and player_name not in acted:
                 player_stats = hand.hand_players.get(player_name)
-                player_stats[f"street{i + 1}CheckRaiseChance"] = True
-                player_stats[f"street{i + 1}CheckRaiseDone"] = act == "raises"
+                setattr(player_stats, f"street{i + 1}CheckRaiseChance", True)
+                setattr(player_stats, f"street{i + 1}CheckRaiseDone", act == "raises")
                 acted.add(player_name)
 
 def aggr(hand, i):
@@ -238,19 +455,19 @@ def aggr(hand, i):
     if i == 0:
         for player in hand.players:
             if player[1] in aggrers:
-                hand.hand_players[player[1]]["street0Aggr"] = True
+                hand.hand_players[player[1]].street0Aggr = True
     else:
         if len(aggrers) > 0:
             for player_name in others:
-                hand.hand_players[player_name][f"otherRaisedStreet{i}"] = True
+                setattr(hand.hand_players[player_name], f"otherRaisedStreet{i}", True)
 
 def folds(hand, i):
     for action in hand.actions[hand.action_streets[i + 1]]:
         if action[1] == "folds":
             player_stats = hand.hand_players.get(action[0])
 
-            if player_stats[f"otherRaisedStreet{i}"]:
-                player_stats[f"foldToOtherRaisedStreet{i}"] = True
+            if getattr(player_stats, f"otherRaisedStreet{i}"):
+                setattr(player_stats, f"foldToOtherRaisedStreet{i}", True)
 
 def fold_to_aggressor(actions, street, aggressor):
     # Returns player names that folded to aggressor.
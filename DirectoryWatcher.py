@@ -0,0 +1,232 @@
+from abc import ABC, abstractmethod
+import ctypes
+import ctypes.util
+import logging
+import os
+import struct
+import sys
+from time import time
+
+# logging has been set up in fpdb.py or HUD_main.py, use their settings:
+log = logging.getLogger("importer")
+
+# Only files modified in the last RECENT_TIME seconds are reported by a full scan
+RECENT_TIME = 300
+
+def get_watcher(paths):
+    # Returns the best watcher available on this platform, polling if nothing else works
+    try:
+        if sys.platform == "win32":
+            return Win32Watcher(paths)
+
+        if sys.platform.startswith("linux"):
+            return InotifyWatcher(paths)
+    except Exception as e:
+        log.warning(f"Directory watcher not available, falling back to polling: {e}")
+
+    return PollingWatcher(paths)
+
+def scan_recent_files(paths):
+    # Full scan of the directories, returns the recently modified files
+    # with their stat results
+    result = {}
+
+    for path in paths:
+        for subdir in os.walk(path):
+            for file in subdir[2]:
+                file_name = os.path.join(subdir[0], file)
+
+                try:
+                    stat_info = os.stat(file_name)
+                except OSError:
+                    continue
+
+                if (time() - stat_info.st_mtime) <= RECENT_TIME:
+                    result[file_name] = stat_info
+
+    return result
+
+class PollingWatcher(object):
+    # Fallback watcher: scans all the directories on every call
+    def __init__(self, paths):
+        self.paths = list(paths)
+        self.seen = {}
+
+        log.info(f"Polling directories {self.paths}")
+
+    def get_changed(self):
+        # Returns the files created or modified since the previous call
+        changed = []
+
+        for file_name, stat_info in scan_recent_files(self.paths).items():
+            key = (stat_info.st_size, stat_info.st_mtime)
+
+            if self.seen.get(file_name) != key:
+                self.seen[file_name] = key
+                changed.append(file_name)
+
+        return changed
+
+    def close(self):
+        pass
+
+class EventWatcher(ABC):
+    # Base for the watchers fed by the operating system: the first call and any call
+    # after the system dropped events (buffer overflow) do a full scan, all the other
+    # calls only return the files named in the pending events
+    def __init__(self, paths):
+        self.paths = list(paths)
+        self.rescan = True
+
+    def get_changed(self):
+        changed = dict.fromkeys(self.read_events())
+
+        if self.rescan:
+            self.rescan = False
+            changed.update(dict.fromkeys(scan_recent_files(self.paths)))
+
+        return [file_name for file_name in changed if os.path.isfile(file_name)]
+
+    @abstractmethod
+    def read_events(self):
+        # Returns the files named in the pending events, sets rescan when events were dropped
+        pass
+
+    def close(self):
+        pass
+
+class InotifyWatcher(EventWatcher):
+    IN_MODIFY = 0x00000002
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_Q_OVERFLOW = 0x00004000
+    IN_ISDIR = 0x40000000
+    IN_NONBLOCK = 0o4000
+    IN_CLOEXEC = 0o2000000
+    EVENT_HEADER = struct.Struct("iIII")
+
+    def __init__(self, paths):
+        super().__init__(paths)
+        self.libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self.fd = self.libc.inotify_init1(self.IN_NONBLOCK | self.IN_CLOEXEC)
+        self.wds = {}
+
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+
+        for path in self.paths:
+            for subdir in os.walk(path):
+                self.add_watch(subdir[0])
+
+        log.info(f"Watching directories {self.paths} with inotify")
+
+    def add_watch(self, path):
+        mask = self.IN_MODIFY | self.IN_CLOSE_WRITE | self.IN_MOVED_TO | self.IN_CREATE
+        wd = self.libc.inotify_add_watch(self.fd, os.fsencode(path), mask)
+
+        if wd < 0:
+            log.warning(f"inotify_add_watch failed for '{path}': {os.strerror(ctypes.get_errno())}")
+        else:
+            self.wds[wd] = path
+
+    def read_events(self):
+        files = []
+
+        while True:
+            try:
+                data = os.read(self.fd, 65536)
+            except BlockingIOError:
+                break
+
+            i = 0
+
+            while i < len(data):
+                wd, mask, cookie, length = self.EVENT_HEADER.unpack_from(data, i)
+                name = data[i + self.EVENT_HEADER.size : i + self.EVENT_HEADER.size + length].rstrip(b"\0")
+                i += self.EVENT_HEADER.size + length
+
+                if mask & self.IN_Q_OVERFLOW:
+                    self.rescan = True
+                elif wd in self.wds and name:
+                    file_name = os.path.join(self.wds[wd], os.fsdecode(name))
+
+                    if mask & self.IN_ISDIR:
+                        if mask & (self.IN_CREATE | self.IN_MOVED_TO):
+                            for subdir in os.walk(file_name):
+                                self.add_watch(subdir[0])
+
+                            # Files may have been written before the watch was added
+                            self.rescan = True
+                    else:
+                        files.append(file_name)
+
+        return files
+
+    def close(self):
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+
+class Win32Watcher(EventWatcher):
+    # ReadDirectoryChangesW in overlapped mode, the results are collected without blocking
+    # when get_changed is called. Changes happening between two calls are buffered by Windows.
+    def __init__(self, paths):
+        super().__init__(paths)
+
+        import pywintypes
+        import win32con
+        import win32event
+        import win32file
+
+        self.win32event = win32event
+        self.win32file = win32file
+        self.flags = win32con.FILE_NOTIFY_CHANGE_FILE_NAME | win32con.FILE_NOTIFY_CHANGE_SIZE | win32con.FILE_NOTIFY_CHANGE_LAST_WRITE
+        self.watches = []
+
+        for path in self.paths:
+            handle = win32file.CreateFile(
+                path,
+                0x0001,  # FILE_LIST_DIRECTORY
+                win32con.FILE_SHARE_READ | win32con.FILE_SHARE_WRITE | win32con.FILE_SHARE_DELETE,
+                None,
+                win32con.OPEN_EXISTING,
+                win32con.FILE_FLAG_BACKUP_SEMANTICS | win32con.FILE_FLAG_OVERLAPPED,
+                None
+            )
+            overlapped = pywintypes.OVERLAPPED()
+            overlapped.hEvent = win32event.CreateEvent(None, False, False, None)
+            buffer = win32file.AllocateReadBuffer(65536)
+
+            self.watches.append((path, handle, overlapped, buffer))
+            self.request(handle, overlapped, buffer)
+
+        log.info(f"Watching directories {self.paths} with ReadDirectoryChangesW")
+
+    def request(self, handle, overlapped, buffer):
+        self.win32file.ReadDirectoryChangesW(handle, buffer, True, self.flags, overlapped)
+
+    def read_events(self):
+        files = []
+
+        for path, handle, overlapped, buffer in self.watches:
+            while self.win32event.WaitForSingleObject(overlapped.hEvent, 0) == self.win32event.WAIT_OBJECT_0:
+                n = self.win32file.GetOverlappedResult(handle, overlapped, False)
+
+                if n == 0:
+                    # The buffer overflowed and the changes were dropped
+                    self.rescan = True
+                else:
+                    for action, name in self.win32file.FILE_NOTIFY_INFORMATION(buffer, n):
+                        if action in (1, 3, 5):  # added, modified, renamed (new name)
+                            files.append(os.path.join(path, name))
+
+                self.request(handle, overlapped, buffer)
+
+        return files
+
+    def close(self):
+        for path, handle, overlapped, buffer in self.watches:
+            handle.Close()
+
+        self.watches = []
@@ -80,7 +80,7 @@ class Filters(QWidget):
 
         if len(result) >= 1:
             for buy_in, fee in result:
-                display_text = f"{buy_in:.2f} + {fee:.2f}"
+                display_text = f"{self.db.from_money(buy_in):.2f} + {self.db.from_money(fee):.2f}"
                 value = f"{buy_in},{fee}"
 
                 self.tourney_buy_ins[value] = QCheckBox(display_text)
@@ -165,7 +165,7 @@ class Filters(QWidget):
 
         if len(result) >= 1:
             for sb, bb in result:
-                display_text = f"{sb:.2f}/{bb:.2f}"
+                display_text = f"{self.db.from_money(sb):.2f}/{self.db.from_money(bb):.2f}"
                 value = f"{sb},{bb}"
 
                 self.stakes[value] = QCheckBox(display_text)
@@ -1,5 +1,6 @@
 import logging
 
+from Exceptions import FpdbError
 import Importer
 
 from PyQt5.QtWidgets import QFileDialog, QHBoxLayout, QLineEdit, QPushButton, QVBoxLayout, QWidget
@@ -13,6 +14,8 @@ class GuiBulkImport(QWidget):
         self.global_lock = global_lock
         self.db = db
         self.importer = Importer.Importer(db, self)
+        self.workers = config.imp.workers
+        self.bulk_load_max_hands = config.imp.bulk_load_max_hands
         self.import_dir = QLineEdit(config.site.hh_path)
 
         import_box = QVBoxLayout()
@@ -37,9 +40,12 @@ class GuiBulkImport(QWidget):
 
             self.importer.add_bulk_import_dir(selected)
 
-            stored, duplicates, errors = self.importer.run_import()
+            try:
+                stored, duplicates, errors = self.importer.run_import(self.workers, self.bulk_load_max_hands)
 
-            log.info(f"Bulk import done: Stored: {stored}, Duplicates: {duplicates}, Errors: {errors}")
+                log.info(f"Bulk import done: Stored: {stored}, Duplicates: {duplicates}, Errors: {errors}")
+            except FpdbError as e:
+                log.error(f"Bulk import failed: {e}")
 
             self.importer.clear_file_list()
 
@@ -0,0 +1,40 @@
+from datetime import datetime
+
+from PyQt5.QtWidgets import QDialog, QLabel, QProgressBar, QVBoxLayout
+
+class ImportProgressDialog(QDialog):
+    # Popup window to show progress
+    # Init method sets up total number of expected iterations
+    # If no parent is passed to init, command line
+    # mode assumed, and does not create a progress bar
+    def __init__(self, total, parent):
+        if parent is None:
+            return
+        super().__init__(parent)
+        self.fraction = 0
+        self.total = total
+        self.p_bar = QProgressBar()
+        self.p_text = QLabel()
+
+        self.setWindowTitle("Importing")
+        self.p_bar.setRange(0, total)
+        self.p_text.setWordWrap(True)
+
+        box = QVBoxLayout()
+        box.addWidget(self.p_bar)
+        box.addWidget(self.p_text)
+
+        self.setLayout(box)
+
+    def progress_update(self, file):
+        self.fraction += 1
+
+        # update total if fraction exceeds expected total number of iterations
+        if self.fraction > self.total:
+            self.total = self.fraction
+            self.p_bar.setRange(0, self.total)
+
+        self.p_bar.setValue(self.fraction)
+
+        now = datetime.now().strftime("%H:%M:%S")
+        self.p_text.setText(f"{now} - Importing {file}\n")
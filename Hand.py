@@ -1,4 +1,5 @@
 from decimal import Decimal
+from functools import partial
 import logging
 
 import DerivedStats
@@ -7,12 +8,37 @@ from Exceptions import FpdbParseError
 # logging has been set up in fpdb.py or HUD_main.py, use their settings:
 log = logging.getLogger("hand")
 
+def parse_amount(amount, digits):
+    # Amount string as an integer number of 1/10**digits units (2 = cents), used with integer money
+    whole, _, fraction = amount.partition(".")
+
+    if fraction[digits:].strip("0"):
+        raise FpdbParseError(f"Amount {amount} has more than {digits} decimals")
+
+    return int(whole or 0) * 10 ** digits + int(fraction[:digits].ljust(digits, "0") or 0)
+
 RANKS = {"A": 14, "K": 13, "Q": 12, "J": 11, "T": 10, "9": 9, "8": 8, "7": 7, "6": 6, "5": 5, "4": 4, "3": 3, "2": 2}
 
 class Hand(object):
-    def __init__(self, game_type, hand_text):
+    # Slotted, a bulk import keeps the hands of a file (and the parser processes pickle them)
+    __slots__ = ("game_type", "hand_text", "amount", "currency_amount", "id", "table_name", "hand_no", "game_type_id",
+                 "start_time", "players_ids", "hero", "button_pos", "tour_no", "tourney_id", "tourney_type_id", "buy_in",
+                 "buy_in_currency", "fee", "speed", "is_private", "is_sng", "is_ko", "ko_bounty", "players",
+                 "player_exists_cache", "bets", "streets", "actions", "board", "hole_cards", "collectees", "stacks",
+                 "won_bounty", "end_bounty", "hand", "hand_players", "hand_actions")
+
+    def __init__(self, game_type, hand_text, integer_money=False):
         self.game_type = game_type
         self.hand_text = hand_text
+
+        # Amounts are Decimal, or ints with integer_money (see Database.integer_money): chips in
+        # tournaments, cents at cash games. The currency amounts (bounties) are always in cents
+        if integer_money:
+            self.amount = partial(parse_amount, digits=0 if game_type["type"] == "tour" else 2)
+            self.currency_amount = partial(parse_amount, digits=2)
+        else:
+            self.amount = self.currency_amount = Decimal
+
         self.id = 0
         self.table_name = ""
         self.hand_no = 0
@@ -35,14 +61,12 @@ class Hand(object):
         self.is_ko = False
         self.ko_bounty = 0
 
-        self.seating = []
         self.players = []
         # Cache used for check_player_exists.
         self.player_exists_cache = set()
 
         # Collections indexed by street names
-        self.bets = {}
-        self.last_bet = {}
+        self.bets = {}  # amount put in by each player on the street
         self.streets = {}
         self.actions = {}  # [['mct','bets','$10'],['mika','folds'],['carlg','raises','$20']]
         self.board = {}  # dict from street names to community cards
@@ -50,12 +74,11 @@ class Hand(object):
         self.collectees = {}
 
         for street in self.action_streets:
-            self.streets[street] = ""  # portions of the hand_text, filled by mark_streets()
+            self.streets[street] = ""  # (start, end) of the street in hand_text, set by mark_streets()
             self.actions[street] = []
 
         for street in self.action_streets:
             self.bets[street] = {}
-            self.last_bet[street] = 0
             self.board[street] = []
 
         # Collections indexed by player names
@@ -63,9 +86,9 @@ class Hand(object):
         self.won_bounty = {}
         self.end_bounty = {}
 
-        self.hand = {}
-        self.hand_players = {}
-        self.hand_actions = {}
+        self.hand = None  # Hands row, see assemble_hand
+        self.hand_players = {}  # DerivedStats.PlayerStats of each player
+        self.hand_actions = []  # HandActions rows without the ids, see assemble_hand_actions
 
     def add_hole_cards(self, player, cards=[]):
         # Assigns observed hole_cards to a player.
@@ -89,23 +112,12 @@ class Hand(object):
             self.tourney_id = db.get_tourney_id_from_hand(self)
 
     def assemble_hand(self, file_id):
-        stats = DerivedStats.stats_initializer()
-
-        for player in self.players:
-            self.hand_players[player[1]] = stats.copy()
-
-        self.hand["tableName"] = self.table_name
-        self.hand["handNo"] = self.hand_no
-        self.hand["tourneyId"] = self.tourney_id
-        self.hand["gameTypeId"] = self.game_type_id
-        self.hand["fileId"] = file_id
-        self.hand["startTime"] = self.start_time
-        self.hand["seats"] = len(self.players_ids)
-        self.hand["heroSeat"] = 0
+        # In the order of the insertHand columns
+        hero_seat = 0
 
         for player in self.players:
             if self.hero == player[1]:
-                self.hand["heroSeat"] = player[0]
+                hero_seat = player[0]
                 break
 
         board_cards = []
@@ -113,81 +125,55 @@ class Hand(object):
         for street in self.community_streets:
             board_cards += self.board[street]
 
-        for i, card in enumerate(board_cards):
-            self.hand[f"boardCard{i + 1}"] = card
+        board_cards += [None] * (5 - len(board_cards))
 
-        if len(board_cards) < 5:
-            for i in range(len(board_cards), 5):
-                self.hand[f"boardCard{i + 1}"] = None
+        self.hand = [self.table_name, self.hand_no, self.tourney_id, self.game_type_id, file_id, self.start_time,
+                     len(self.players_ids), hero_seat, *board_cards]
 
-        DerivedStats.vpip(self)
-        DerivedStats.calc_streets_seen(self)
+    def assemble_hand_players(self):
+        # Doesn't need any database id, so it can run in a parser process before prep_insert
+        for player in self.players:
+            self.hand_players[player[1]] = DerivedStats.PlayerStats()
 
         self.set_positions()
-
-    def assemble_hand_players(self):
-        # street0VPI/vpip already called in Hand
+        DerivedStats.calc_stats(self)
 
         for player in self.players:
             player_name = player[1]
             player_stats = self.hand_players.get(player_name)
-            player_stats["startStack"] = Decimal(player[2])
+            player_stats.startStack = self.amount(player[2])
 
             if player[4] is not None:
-                player_stats["startBounty"] = Decimal(player[4])
-                player_stats["endBounty"] = Decimal(player[4])
+                player_stats.startBounty = self.currency_amount(player[4])
+                player_stats.endBounty = self.currency_amount(player[4])
 
                 if player_name in self.end_bounty:
-                    player_stats["endBounty"] = self.end_bounty.get(player_name)
+                    player_stats.endBounty = self.end_bounty.get(player_name)
 
-            player_stats["seatNo"] = player[0]
+            player_stats.seatNo = player[0]
 
             if player_name in list(self.hole_cards.keys()):
-                player_stats["card1"] = self.hole_cards[player_name][0]
-                player_stats["card2"] = self.hole_cards[player_name][1]
-                player_stats["startingHand"] = self.get_starting_hand(player_stats["card1"], player_stats["card2"])
+                player_stats.card1 = self.hole_cards[player_name][0]
+                player_stats.card2 = self.hole_cards[player_name][1]
+                player_stats.startingHand = self.get_starting_hand(player_stats.card1, player_stats.card2)
 
             if player_name in list(self.collectees.keys()):
-                player_stats["winnings"] = self.collectees[player_name]
+                player_stats.winnings = self.collectees[player_name]
 
-                if player_stats["street1Seen"]:
-                    player_stats["wonWhenSeenStreet1"] = True
+                if player_stats.street1Seen:
+                    player_stats.wonWhenSeenStreet1 = True
 
-            paid = player_stats["startStack"] - self.stacks[player_name]
-            player_stats["totalProfit"] = player_stats["winnings"] - paid
-
-        for i in enumerate(self.action_streets[1:]):
-            DerivedStats.aggr(self, i[0])
-
-            if i[0] > 0:
-                DerivedStats.folds(self, i[0])
-
-        DerivedStats.calc_cbets(self)
-        DerivedStats.calc_check_raise(self)
-        DerivedStats.calc_tfbets(self)
-        DerivedStats.calc_steals(self)
+            paid = player_stats.startStack - self.stacks[player_name]
+            player_stats.totalProfit = player_stats.winnings - paid
 
     def assemble_hand_actions(self):
-        k = 0
-
+        # (player, street, action, amount, allIn) rows, the ids are added by Database.get_hand_actions_data
         for street in self.action_streets:
             for action in self.actions[street]:
-                self.hand_actions[k] = {}
-                self.hand_actions[k]["player"] = action[0]
-                self.hand_actions[k]["street"] = street
-                self.hand_actions[k]["action"] = action[1]
-
-                if len(action) > 2:
-                    self.hand_actions[k]["amount"] = action[2]
-                else:
-                    self.hand_actions[k]["amount"] = 0
-
                 if len(action) > 3:
-                    self.hand_actions[k]["allIn"] = action[-1]
+                    self.hand_actions.append((action[0], street, action[1], action[2], action[-1]))
                 else:
-                    self.hand_actions[k]["allIn"] = False
-
-                k += 1
+                    self.hand_actions.append((action[0], street, action[1], 0, False))
 
     def set_positions(self):
         # Sets the position for each player in HandPlayers starting from D = 0 counter clockwise
@@ -195,13 +181,13 @@ class Hand(object):
 
         button_index = [i for i, x in enumerate(self.players) if x[0] == self.button_pos][0]
 
-        self.hand_players[self.players[button_index][1]]["position"] = 0
+        self.hand_players[self.players[button_index][1]].position = 0
 
         reverse_index = button_index - 1
         position = 1
 
         while self.players[reverse_index][0] != self.button_pos:
-            self.hand_players[self.players[reverse_index][1]]["position"] = position
+            self.hand_players[self.players[reverse_index][1]].position = position
             reverse_index -= 1
             position += 1
 
@@ -209,10 +195,10 @@ class Hand(object):
         sb = [x[0] for x in self.actions[self.action_streets[1]] if x[1] == "small blind"]
 
         if bb:
-            self.hand_players[bb[0]]["position"] = "B"
+            self.hand_players[bb[0]].position = "B"
 
         if sb:
-            self.hand_players[sb[0]]["position"] = "S"
+            self.hand_players[sb[0]].position = "S"
 
     def add_player(self, seat, name, chips, position=None, bounty=None):
         # Adds a player to the hand, and initialises data structures indexed by player.
@@ -226,15 +212,15 @@ class Hand(object):
 
         if chips is not None:
             self.players.append([seat, name, chips, position, bounty])
-            self.stacks[name] = Decimal(chips)
+            self.stacks[name] = self.amount(chips)
 
             for street in self.action_streets:
-                self.bets[street][name] = []
+                self.bets[street][name] = 0
 
-    def add_streets(self, match):
-        # go through m and initialise actions to empty list for each street.
-        if match:
-            self.streets.update(match.groupdict())
+    def add_streets(self, spans):
+        # spans maps the streets to their (start, end) in hand_text, None for the streets which aren't there
+        if spans:
+            self.streets.update(spans)
 
             log.debug(f"add_streets:\n{str(self.streets)}")
         else:
@@ -266,12 +252,12 @@ class Hand(object):
         self.check_player_exists(player, "add_ante")
 
         street = "ANTES"
-        amount = Decimal(amount)
+        amount = self.amount(amount)
         self.stacks[player] -= amount
 
         act = (player, "ante", amount, self.stacks[player] == 0)
         self.actions[street].append(act)
-        self.bets[street][player].append(amount)
+        self.bets[street][player] += amount
 
     def add_blind(self, player, blind_type, amount):
         # if player is None, it's a missing small blind.
@@ -286,40 +272,34 @@ class Hand(object):
         self.check_player_exists(player, "add_blind")
 
         street = "PREFLOP"
-        amount = Decimal(amount)
+        amount = self.amount(amount)
         self.stacks[player] -= amount
 
         act = (player, blind_type, amount, self.stacks[player] == 0)
         self.actions[street].append(act)
-        self.bets[street][player].append(amount)
-
-        if amount > self.last_bet.get(street):
-            self.last_bet[street] = amount
+        self.bets[street][player] += amount
 
     def add_call(self, street, player, amount):
         log.debug(f"add_call: {street} {player} calls {amount}")
 
         self.check_player_exists(player, "add_call")
 
-        amount = Decimal(amount)
+        amount = self.amount(amount)
         self.stacks[player] -= amount
 
         act = (player, "calls", amount, self.stacks[player] == 0)
         self.actions[street].append(act)
-        self.bets[street][player].append(amount)
-
-        if amount > self.last_bet.get(street):
-            self.last_bet[street] = amount
+        self.bets[street][player] += amount
 
     def add_raise_to(self, street, player, amount, amount_to):
         log.debug(f"add_raise_to: {street} {player} raises {amount} to {amount_to}")
 
         self.check_player_exists(player, "add_raise_to")
 
-        amount = Decimal(amount)
-        amount_to = Decimal(amount_to)
+        amount = self.amount(amount)
+        amount_to = self.amount(amount_to)
 
-        bets = sum(self.bets[street][player])
+        bets = self.bets[street][player]
         called = amount_to - amount - bets
         raised = called + amount
 
@@ -327,21 +307,19 @@ class Hand(object):
 
         act = (player, "raises", amount, amount_to, called, self.stacks[player] == 0)
         self.actions[street].append(act)
-        self.bets[street][player].append(raised)
-        self.last_bet[street] = amount_to
+        self.bets[street][player] += raised
 
     def add_bet(self, street, player, amount):
         log.debug(f"add_bet: {street} {player} bets {amount}")
 
         self.check_player_exists(player, "add_bet")
 
-        amount = Decimal(amount)
+        amount = self.amount(amount)
         self.stacks[player] -= amount
 
         act = (player, "bets", amount, self.stacks[player] == 0)
         self.actions[street].append(act)
-        self.bets[street][player].append(amount)
-        self.last_bet[street] = amount
+        self.bets[street][player] += amount
 
     def add_fold(self, street, player):
         log.debug(f"add_fold: {street} {player} folds")
@@ -362,7 +340,7 @@ class Hand(object):
 
         self.check_player_exists(player, "add_uncalled")
 
-        amount = Decimal(amount)
+        amount = self.amount(amount)
         self.stacks[player] += amount
 
     def add_collected(self, street, player, amount):
@@ -370,7 +348,7 @@ class Hand(object):
 
         self.check_player_exists(player, "add_collected")
 
-        amount = Decimal(amount)
+        amount = self.amount(amount)
 
         if player in list(self.collectees.keys()):
             self.collectees[player] += amount
@@ -393,16 +371,22 @@ class Hand(object):
         return f"{self.get_ordered_hand(card1[0], card2[0])}o"
 
 class HoldemHand(Hand):
+    __slots__ = ("hole_streets", "community_streets", "action_streets")
+
     def __init__(self, hhc, game_type, hand_text):
         self.hole_streets = ["PREFLOP"]
         self.community_streets = ["FLOP", "TURN", "RIVER"]
         self.action_streets = ["ANTES", "PREFLOP", "FLOP", "TURN", "RIVER"]
         
-        super().__init__(game_type, hand_text)
+        super().__init__(game_type, hand_text, hhc.integer_money)
 
         # Populate a HoldemHand
         # Generally, we call 'read' methods here, which get the info according to the particular filter (hhc)
         # which then invokes a 'add_XXX' callback
+        # read_lines makes all the callbacks in one pass over the hand, when it can't the readers do
+        if hhc.read_lines(self):
+            return
+
         hhc.read_hand_info(self)
         hhc.read_button(self)
         hhc.read_player_stacks(self)
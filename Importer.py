@@ -1,18 +1,56 @@
+from concurrent.futures import Future, ProcessPoolExecutor
 from datetime import datetime
+import hashlib
 import logging
+import logging.handlers
+import multiprocessing
 import os
-from time import time
+import queue
+import threading
+from time import perf_counter, time
 import zmq
 
+import Archives
+import Database
+import DirectoryWatcher
 from Exceptions import FpdbParseError
 import PokerStarsSummary
 import PokerStarsToFpdb
 
-from PyQt5.QtCore import QCoreApplication
-from PyQt5.QtWidgets import QDialog, QLabel, QProgressBar, QVBoxLayout
+# PyQt5 is only imported when there's a parent window, the command line import runs without it
 
 # logging has been set up in fpdb.py or HUD_main.py, use their settings:
 log = logging.getLogger("importer")
+# rolling metrics file, see Configuration.set_metrics_file
+metrics_log = logging.getLogger("metrics")
+
+# Import stages timed in Importer.stage_times. read, parse (regexes) and stats (DerivedStats) are
+# measured by the parser, summed over the parser processes. wait is the time spent waiting for them
+STAGES = ["read", "parse", "stats", "wait", "ids", "assemble", "insert", "hudcache", "commit", "summary"]
+
+# Bytes at the start of a file hashed in its Files fingerprint
+PREFIX_HASH_SIZE = 1 << 16
+
+def put_item(q, item, stop):
+    # Put on a bounded pipeline queue, gives up when the pipeline is stopped
+    while not stop.is_set():
+        try:
+            q.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            pass
+
+    return False
+
+def get_item(q, stop):
+    # Get from a pipeline queue, None when the pipeline is stopped
+    while not stop.is_set():
+        try:
+            return q.get(timeout=0.1)
+        except queue.Empty:
+            pass
+
+    return None
 
 class ZMQSender:
     def __init__(self, port="5555"):
@@ -33,16 +71,93 @@ class ZMQSender:
         self.context.term()
         log.info("ZMQ sender closed")
 
+class LogForwarder(logging.Handler):
+    # Writes the log records of the parser processes with the handlers of their logger in this process
+    def emit(self, record):
+        logger = logging.getLogger(record.name)
+
+        if logger.isEnabledFor(record.levelno):
+            logger.handle(record)
+
 class FPDBFile(object):
-    def __init__(self, path, ftype):
-        self.path = path
+    def __init__(self, path, ftype, archive=None, member=None):
+        self.path = path  # archive path joined with the member name for an archive member
         self.ftype = ftype  # Valid: hh, summary
+        self.archive = archive
+        self.member = member
         self.id = 0
+        self.byte_offset = 0  # committed with the hands, the import resumes from there
+        self.fingerprint = (None, None, None)  # size, mtime and prefix hash recorded with byte_offset
+        self.size = None  # size of an archive member, once known
+        self.prefix = b""  # start of the file, see get_prefix_hash
+
+    def open(self):
+        # Binary stream of the file, archive members are decompressed while they are read
+        if self.archive is not None:
+            return Archives.open_member(self.archive, self.member)
+
+        return open(self.path, "rb")
+
+    def get_size(self):
+        # None when the size of an archive member isn't known
+        if self.archive is None:
+            return os.path.getsize(self.path)
+
+        if self.size is None:
+            self.size = Archives.get_member_size(self.archive, self.member)
+
+        return self.size
+
+    def get_mtime(self):
+        # Archive members get the time of their archive
+        return os.path.getmtime(self.path if self.archive is None else self.archive)
+
+    def get_prefix_hash(self, byte_offset):
+        # Hash of the imported part of the file, only its first PREFIX_HASH_SIZE bytes are read
+        length = min(byte_offset, PREFIX_HASH_SIZE)
+
+        if len(self.prefix) < length:
+            with self.open() as file_reader:
+                self.prefix = file_reader.read(PREFIX_HASH_SIZE)
+
+        return hashlib.blake2b(self.prefix[:length], digest_size=16).hexdigest()
+
+    def get_read_size(self):
+        # Size of a small file, read to find it when the archive doesn't record it
+        size = self.get_size()
+
+        if size is None:
+            with self.open() as file_reader:
+                self.size = size = len(file_reader.read())
+
+        return size
+
+    def is_imported(self):
+        # True when the file was fully imported and is unchanged since, found without reading it
+        size, mtime, prefix_hash = self.fingerprint
+
+        if self.byte_offset == 0 or self.byte_offset != size or mtime != self.get_mtime():
+            return False
+
+        return self.get_size() in (size, None)
+
+    def has_prefix(self):
+        # False when the imported part of the file was replaced, the import starts over then
+        size, mtime, prefix_hash = self.fingerprint
+
+        if self.byte_offset == 0 or prefix_hash is None:
+            return True
+
+        try:
+            return self.get_prefix_hash(self.byte_offset) == prefix_hash
+        except Exception as e:
+            log.warning(f"Can't read {self.path}: {e}")
+            return False
 
     def set_id(self, db):
         file = os.path.basename(self.path)
 
-        self.id = db.get_file_id(file)
+        self.id, self.byte_offset, *self.fingerprint = db.get_file(file)
 
         if self.id == 0:
             self.id = db.insert_file([file, datetime.now(), 0, 0, 0, 0, False])
@@ -51,30 +166,55 @@ class FPDBFile(object):
 class Importer(object):
     def __init__(self, db, parent=None):
         self.db = db
-        self.parent = parent
+        self.parent = parent  # None when run from the command line
+        self.auto_import = type(parent).__module__ == "GuiAutoImport"
         self.zmq_sender = None
+        self.watcher = None
         self.dir_list = []
         self.file_list = {}
+        self.changed_files = {}  # files to check in the next run_updated, used as an ordered set
         self.updated_size = {}
         self.updated_time = {}
-        self.pos_in_file = {}  # dict to remember how far we have read in the file
+        self.pos_in_file = {}  # dict to remember how far (byte offset) we have read in the file
+        self.stage_times = {}  # seconds spent in each import stage, see STAGES
+        self.stage_times_lock = threading.Lock()  # read is timed by the read_stage thread and this one
+        self.counters = {}  # hands and bytes read, with stage_times since reset_metrics
+        self.metrics_start = 0
+        self.commit_retries = 0
+
+        self.reset_metrics()
 
     # Set functions
     def clear_file_list(self):
         self.file_list = {}
+        self.changed_files = {}
         self.updated_size = {}
         self.pos_in_file = {}
 
-    def log_import(self, stored, duplicates, errors, id):
+    def log_import(self, stored, duplicates, errors, f, byte_offset):
+        # Not committed here: the caller commits it with the hands, so the byte offset
+        # recorded in Files always matches what is stored. The fingerprint of the file
+        # is recorded with it, see FPDBFile.is_imported
         hands = stored + duplicates + errors
-        self.db.update_file([datetime.now(), hands, stored, duplicates, errors, True, id])
+        f.byte_offset = byte_offset
+        f.fingerprint = (f.get_size(), f.get_mtime(), f.get_prefix_hash(byte_offset))
+
+        self.db.update_file([datetime.now(), hands, stored, duplicates, errors, True, byte_offset, *f.fingerprint, f.id])
+
+    def log_no_hands(self, f):
+        # A file without new hands is recorded as imported too, at the offset it was read from
+        self.log_import(0, 0, 0, f, self.pos_in_file.get(f.path, 0))
         self.db.commit()
 
     # Add an individual file to file_list
-    def add_import_file(self, file, file_name):
+    def add_import_file(self, file, file_name, archive=None, member=None):
         if self.file_list.get(file) is not None:
             return False
 
+        if archive is None and Archives.is_archive(file_name):
+            log.info(f"Importer.add_import_file: Archives are only read by the bulk import: '{file}'")
+            return False
+
         if file_name.startswith("HH"):
             file_type = "hh"
         elif file_name.startswith("TS"):
@@ -83,78 +223,335 @@ class Importer(object):
             log.error(f"Importer.add_import_file: Failed for: '{file}'")
             return False
 
-        fpdb_file = FPDBFile(file, file_type)
+        fpdb_file = FPDBFile(file, file_type, archive, member)
         fpdb_file.set_id(self.db)
 
+        if fpdb_file.is_imported():
+            log.info(f"Skipping {file}, already imported")
+            return False
+
         self.file_list[file] = fpdb_file
 
+        # Resume from the committed offset, unless the file was replaced by a smaller or another one
+        size = fpdb_file.get_size()
+
+        if (size is None or fpdb_file.byte_offset <= size) and fpdb_file.has_prefix():
+            self.pos_in_file[file] = fpdb_file.byte_offset
+
         return True
 
+    # Add the members of an archive, each one is a file of its own
+    def add_archive(self, path):
+        try:
+            members = Archives.list_members(path)
+        except Exception as e:
+            log.error(f"Importer.add_archive: Failed for: '{path}': {e}")
+            return
+
+        for member in members:
+            self.add_import_file(os.path.join(path, member), os.path.basename(member), path, member)
+
     # Called from GuiBulkImport to add a directory.
     def add_bulk_import_dir(self, path):
-        # Add files for bulk import
+        # Add files for bulk import, compressed archives included
         for subdir in os.walk(path):
             for file in subdir[2]:
-                self.add_import_file(os.path.join(subdir[0], file), file)
+                if Archives.is_archive(file):
+                    self.add_archive(os.path.join(subdir[0], file))
+                else:
+                    self.add_import_file(os.path.join(subdir[0], file), file)
 
     # Called from GuiAutoImport to add a directory.
     def add_auto_import_dir(self, path):
         if os.path.isdir(path):
-            self.dir_list.append(path)
+            if path not in self.dir_list:
+                self.dir_list.append(path)
+
+                # Watch the new directory list from the next check_for_files
+                self.close_watcher()
         else:
             log.warning(f"Attempted to add non-directory '{str(path)}' as an import directory")
 
     def check_for_files(self):
-        for path in self.dir_list:
-            for subdir in os.walk(path):
-                for file in subdir[2]:
-                    file_name = os.path.join(subdir[0], file)
+        # Only the files created or modified since the last check are reported by the watcher
+        if self.watcher is None:
+            self.watcher = DirectoryWatcher.get_watcher(self.dir_list)
+
+        for file_name in self.watcher.get_changed():
+            self.add_import_file(file_name, os.path.basename(file_name))
 
-                    if (time() - os.stat(file_name).st_mtime) <= 300:
-                        self.add_import_file(file_name, file)
+            if file_name in self.file_list:
+                self.changed_files[file_name] = True
 
-    def run_import(self):
+    def close_watcher(self):
+        if self.watcher is not None:
+            self.watcher.close()
+            self.watcher = None
+
+    def run_import(self, workers=1, bulk_load_max_hands=0):
         # Run full import on self.file_list. This is called from GuiBulkImport.py
         log.info(f"Started at {datetime.now()} -- {len(self.file_list)} files to import.")
 
-        return self.import_files()
+        return self.import_files(workers, bulk_load_max_hands)
 
-    def import_files(self):
+    def import_files(self, workers=1, bulk_load_max_hands=0):
         # Read filenames in self.file_list and pass to despatcher.
+        # The files go through a pipeline with bounded queues: read_stage reads the hh files in
+        # batches of complete hands, parse_stage parses them (in a process pool when workers > 1)
+        # and this thread resolves the ids and stores each batch with its own commit. It stays the
+        # only db writer and gets the batches in file_list order, so the memory used doesn't grow
+        # with the size of the files. The summaries are imported in one batch after the hands,
+        # see import_summary_files.
+        # When the database holds fewer than bulk_load_max_hands hands the import runs in
+        # bulk-load mode, the Hands and HandPlayers indexes are rebuilt at the end
         tot_stored = 0
         tot_duplicates = 0
         tot_errors = 0
 
-        # prepare progress popup window
-        progress_dialog = ImportProgressDialog(len(self.file_list), self.parent)
-        progress_dialog.resize(500, 200)
-        progress_dialog.show()
+        self.reset_metrics()
 
-        for path, f in list(self.file_list.items()):
-            progress_dialog.progress_update(os.path.basename(path))
+        # Files are resumed from their committed offset, the ones fully imported aren't opened
+        files = []
 
-            if f.ftype == "hh":
-                stored, duplicates, errors = self.import_hh_file(f)
-            elif f.ftype == "summary":
-                stored, duplicates, errors = self.import_summary_file(f, self.db.hero_name)
+        for path, f in self.file_list.items():
+            index = self.pos_in_file.get(path, 0)
+
+            if index > 0 and index == f.get_size():
+                log.info(f"Skipping {path}, already imported")
+                self.log_no_hands(f)
+            else:
+                files.append((f, index))
 
-            tot_stored += stored
-            tot_duplicates += duplicates
-            tot_errors += errors
+        # prepare progress popup window, not in command line mode
+        progress_dialog = None
 
-            self.log_import(stored, duplicates, errors, f.id)
+        if self.parent:
+            from GuiImportProgress import ImportProgressDialog
 
-        progress_dialog.accept()
-        del progress_dialog
+            progress_dialog = ImportProgressDialog(len(files), self.parent)
+            progress_dialog.resize(500, 200)
+            progress_dialog.show()
+
+        executor = None
+        hh_count = len([f for f, index in files if f.ftype == "hh"])
+        bulk_load = hh_count > 1 and self.db.get_hand_count() < bulk_load_max_hands
+
+        if bulk_load:
+            self.db.start_bulk_load()
+
+        if workers < 1:
+            workers = os.cpu_count() or 1
+
+        log_listener = None
+
+        if workers > 1 and len(files) > 1:
+            log.info(f"Parsing {len(files)} files in {workers} processes")
+
+            log_queue = multiprocessing.Queue()
+            log_listener = logging.handlers.QueueListener(log_queue, LogForwarder())
+            log_listener.start()
+
+            # Without UK_Hands the parser processes can't look up the stored hands cheaply
+            db_path = None if bulk_load else self.db.db_path
+            executor = ProcessPoolExecutor(max_workers=workers, initializer=PokerStarsToFpdb.init_parser_process,
+                                           initargs=(db_path, log_queue, logging.getLogger().getEffectiveLevel()))
+
+        stop = threading.Event()
+        read_queue = queue.Queue(maxsize=workers * 2)
+        parsed_queue = queue.Queue(maxsize=workers * 2)
+        threads = [
+            threading.Thread(target=self.read_stage, args=(files, read_queue, stop), daemon=True),
+            threading.Thread(target=self.parse_stage, args=(read_queue, parsed_queue, executor, not bulk_load, stop), daemon=True)
+        ]
+
+        for thread in threads:
+            thread.start()
+
+        imported = False
+
+        try:
+            current = None
+            stored, duplicates, errors, batches = 0, 0, 0, 0
+            summaries = []
+
+            while True:
+                start = perf_counter()
+                item = parsed_queue.get()
+
+                if isinstance(item, Exception):
+                    raise item
+
+                if item is None:
+                    break
+
+                f, hhc = item
+
+                if isinstance(hhc, Future):
+                    hhc = hhc.result()
+
+                self.add_stage_time("wait", start)
+
+                if f is not current:
+                    current = f
+
+                    if progress_dialog is not None:
+                        progress_dialog.progress_update(os.path.basename(f.path))
+
+                if f.ftype == "summary":
+                    # Imported together once the hands are stored, their tourneys exist then
+                    summaries.append(f)
+                    continue
+
+                if hhc is not None:
+                    # One batch of the file
+                    batch_stored, batch_duplicates, batch_errors = self.store_hh_file(f, hhc)
+
+                    stored += batch_stored
+                    duplicates += batch_duplicates
+                    errors += batch_errors
+                    batches += 1
+                    continue
+
+                # End of the file, Files was updated with each batch
+                if batches == 0:
+                    self.log_no_hands(f)
+
+                tot_stored += stored
+                tot_duplicates += duplicates
+                tot_errors += errors
+
+                stored, duplicates, errors, batches = 0, 0, 0, 0
+
+            if summaries:
+                stored, duplicates, errors = self.import_summary_files(summaries, executor)
+
+                tot_stored += stored
+                tot_duplicates += duplicates
+                tot_errors += errors
+
+            imported = True
+        finally:
+            stop.set()
+
+            for thread in threads:
+                thread.join()
+
+            if executor is not None:
+                executor.shutdown(cancel_futures=True)
+
+            if log_listener is not None:
+                log_listener.stop()
+
+            if progress_dialog is not None:
+                progress_dialog.accept()
+                del progress_dialog
+
+            if bulk_load and imported:
+                self.db.finish_bulk_load()
+            elif bulk_load:
+                # The batch being stored is dropped. The error of the import is the one raised, the
+                # indexes are rebuilt by the next Database.connect when they can't be now
+                try:
+                    self.db.rollback()
+                    self.db.finish_bulk_load()
+                except Exception as e:
+                    log.error(f"Importer.import_files: Bulk-load indexes not rebuilt after the failed import: {e}")
+
+        metrics_log.info(f"Bulk import: {'; '.join(self.get_metrics())}")
 
         return tot_stored, tot_duplicates, tot_errors
 
+    def read_stage(self, files, read_queue, stop):
+        # Pipeline thread: queues (f, hand_texts, index) for each batch of a hh file, then (f, None, None)
+        # when the file is done. Summaries only get the (f, None, None) item, they're imported in order
+        for f, index in files:
+            if f.ftype == "hh":
+                log.info(f"Converting {f.path}")
+
+                try:
+                    with f.open() as file_reader:
+                        batches = PokerStarsToFpdb.read_hand_batches(file_reader, index)
+                        previous = None
+
+                        # Each batch is queued once the next one is read, the size of the file is
+                        # known when its last batch is stored even if the archive doesn't record it
+                        while True:
+                            start = perf_counter()
+                            batch = next(batches, None)
+                            self.add_stage_time("read", start)
+
+                            if batch is None:
+                                break
+
+                            if previous is not None and not put_item(read_queue, (f,) + previous, stop):
+                                return
+
+                            previous = batch
+
+                        if previous is not None:
+                            if f.archive is not None:
+                                f.size = previous[1]
+
+                            if not put_item(read_queue, (f,) + previous, stop):
+                                return
+                except Exception as e:
+                    log.error(f"Failed to read file {f.path}: {e}")
+
+            if not put_item(read_queue, (f, None, None), stop):
+                return
+
+        put_item(read_queue, None, stop)
+
+    def parse_stage(self, read_queue, parsed_queue, executor, check_duplicates, stop):
+        # Pipeline thread: queues (f, hhc) for each batch, hhc is a Future of the executor when there's one.
+        # The futures are queued in order, the bounded queue limits the number of batches in flight.
+        # The parser processes skip the stored hands with their own connection, this thread opens one too
+        hands_reader = None
+        integer_money = self.db.integer_money
+
+        try:
+            if executor is None and check_duplicates:
+                try:
+                    hands_reader = Database.HandsReader(self.db.db_path)
+                except Exception as e:
+                    log.warning(f"Parser can't read the database, duplicate hands will be parsed: {e}")
+
+            while True:
+                item = get_item(read_queue, stop)
+
+                if item is None:
+                    put_item(parsed_queue, None, stop)
+                    break
+
+                f, hand_texts, index = item
+
+                if hand_texts is None:
+                    hhc = None
+                elif executor is not None:
+                    hhc = executor.submit(PokerStarsToFpdb.parse_file, f.path, index, None, hand_texts, integer_money)
+                else:
+                    get_duplicate_hands = hands_reader.get_duplicate_hands if hands_reader is not None else None
+                    hhc = PokerStarsToFpdb.parse_file(f.path, index, get_duplicate_hands, hand_texts, integer_money)
+
+                if not put_item(parsed_queue, (f, hhc), stop):
+                    break
+        except Exception as e:
+            put_item(parsed_queue, e, stop)
+        finally:
+            if hands_reader is not None:
+                hands_reader.close()
+
     # Run import on updated files, then store latest update time. Called from GuiAutoImport.py
     def run_updated(self):
         # Check for new files in monitored directories
+        self.reset_metrics()
         self.check_for_files()
 
-        for path, f in list(self.file_list.items()):
+        changed_files, self.changed_files = self.changed_files, {}
+
+        for path in changed_files:
+            f = self.file_list[path]
+
             if os.path.exists(path):
                 stat_info = os.stat(path)
 
@@ -165,8 +562,6 @@ class Importer(object):
                         elif f.ftype == "summary":
                             stored, duplicates, errors = self.import_summary_file(f, self.db.hero_name)
 
-                        self.log_import(stored, duplicates, errors, f.id)
-
                         try:
                             # Note: This assumes that whatever calls us has an "add_text" func
                             self.parent.add_text(f"{os.path.basename(path)} {stored} stored, {duplicates} duplicates, {errors} errors")
@@ -179,98 +574,188 @@ class Importer(object):
                     if (time() - stat_info.st_mtime) < 60:
                         self.updated_size[path] = 0
                         self.updated_time[path] = 0
+                        # Imported on the next run even if it doesn't change again
+                        self.changed_files[path] = True
                     else:
                         self.updated_size[path] = stat_info.st_size
                         self.updated_time[path] = time()
 
-    def import_hh_file(self, f):
-        stored, duplicates, errors = 0, 0, 0
+        if self.counters["hands"] > 0:
+            metrics = self.get_metrics()
+            metrics_log.info(f"Auto import: {'; '.join(metrics)}")
+
+            for line in metrics:
+                self.parent.add_text(f"  {line}")
 
+    def import_hh_file(self, f):
+        # The new hands of the file are parsed and stored one block at a time, see PokerStarsToFpdb.iter_file
         log.info(f"Converting {f.path}")
 
-        if f.path in self.pos_in_file:
-            index = self.pos_in_file[f.path]
-        else:
-            self.pos_in_file[f.path], index = 0, 0
+        stored, duplicates, errors, batches = 0, 0, 0, 0
+
+        try:
+            for hhc in PokerStarsToFpdb.iter_file(f.path, self.pos_in_file.get(f.path, 0), self.auto_import, self.db.get_duplicate_hands, self.db.integer_money):
+                batch_stored, batch_duplicates, batch_errors = self.store_hh_file(f, hhc)
+
+                stored += batch_stored
+                duplicates += batch_duplicates
+                errors += batch_errors
+                batches += 1
+        except (OSError, UnicodeDecodeError) as e:
+            log.error(f"Failed to read file {f.path}: {e}")
+
+        if batches == 0:
+            self.log_no_hands(f)
+
+        return stored, duplicates, errors
+
+    def store_hh_file(self, f, hhc):
+        # Writes the hands of a parsed file, hhc comes from PokerStarsToFpdb.parse_file
+        stored, duplicates, errors = 0, 0, 0
 
-        hhc = PokerStarsToFpdb.PokerStars(f.path, index, self.parent.__module__ == "GuiAutoImport")
+        self.counters["bytes"] += hhc.index - self.pos_in_file.get(f.path, 0)
+        self.counters["hands"] += hhc.num_hands
+        self.add_stage_seconds("read", hhc.read_time)
+        self.add_stage_seconds("parse", hhc.parse_time)
+        self.add_stage_seconds("stats", hhc.stats_time)
 
         self.pos_in_file[f.path] = hhc.index
 
         # Tally the results
         errors = hhc.num_errors
-        stored = hhc.num_hands - errors
+        duplicates = hhc.num_duplicates
+        stored = hhc.num_hands - errors - duplicates
+        to_hud = []
 
         if stored > 0:
             if self.parent:
                 self.progress_notify()
 
-            hand_list = hhc.processed_hands
-            to_hud = []
+            # Drop the hands already stored, or seen earlier in the file. The parser does it when it
+            # has access to the database, files parsed in another process are only checked here
+            start = perf_counter()
+            known_hands = self.db.get_duplicate_hands([hand.hand_no for hand in hhc.processed_hands])
+            hand_list = []
+
+            for hand in hhc.processed_hands:
+                if hand.hand_no in known_hands:
+                    duplicates += 1
+                else:
+                    known_hands.add(hand.hand_no)
+                    hand_list.append(hand)
 
             ####Lock Placeholder####
+            self.db.check_cache()
+
             for hand in hand_list:
                 hand.prep_insert(self.db)
 
             self.db.commit()
             ####Lock Placeholder####
+            self.add_stage_time("ids", start)
+
+            start = perf_counter()
 
             for hand in hand_list:
                 hand.assemble_hand(f.id)
-                hand.assemble_hand_players()
-                hand.assemble_hand_actions()
+
+            self.add_stage_time("assemble", start)
 
             ####Lock Placeholder####
-            for hand in hand_list:
-                try:
-                    if self.db.is_hand_duplicate(hand.hand_no):
-                        duplicates += 1
-                    else:
-                        hand.id = self.db.insert_hand(list(hand.hand.values()))
-                        self.db.store_hand_players(hand.id, hand.players_ids, hand.hand_players)
-                        self.db.store_hand_actions(hand.id, hand.players_ids, hand.hand_actions)
-                        self.db.store_hud_cache(hand.game_type_id, hand.players_ids, hand.hand_players)
+            # The batch is written in a savepoint. When it fails it's rolled back and written again hand
+            # by hand, only the hands which fail are lost then
+            self.db.savepoint("batch")
 
-                        if hand.hero in hand.won_bounty:
-                            self.db.update_tourney_bounties([hand.won_bounty[hand.hero], hand.tourney_id])
+            try:
+                to_hud = self.insert_hands(hand_list)
+            except Exception as e:
+                log.error(f"Importer.store_hh_file: '{f.path}' Batch failed, storing its hands one by one: '{e}'")
 
-                        to_hud.append(hand.id)
-                except Exception as e:
-                    log.error(f"Importer.import_hh_file: '{f.path}' Fatal error: '{e}'")
+                self.db.rollback_to_savepoint("batch")
 
-            self.db.commit()
-            ####Lock Placeholder####
-
-            # Pipe the hand.id out to the HUD
-            if self.parent.__module__ == "GuiAutoImport":
-                if self.zmq_sender is None:
-                    self.zmq_sender = ZMQSender()
+                for hand in hand_list:
+                    self.db.savepoint("hand")
 
-                for hand_id in to_hud:
                     try:
-                        log.debug(f"Sending hand ID {hand_id} to HUD via socket")
+                        to_hud += self.insert_hands([hand])
+                        self.db.release_savepoint("hand")
+                    except Exception as e:
+                        log.error(f"Importer.store_hh_file: '{f.path}' Fatal error: '{e}'")
+
+                        self.db.rollback_to_savepoint("hand")
+                        self.db.release_savepoint("hand")
+                        errors += 1
+
+                        if self.db.bulk_hand_nos is not None:
+                            self.db.bulk_hand_nos.discard(hand.hand_no)
+
+            stored = hhc.num_hands - errors - duplicates
+
+        # The tallies and the byte offset go in the same transaction as the hands
+        start = perf_counter()
+        self.log_import(stored, duplicates, errors, f, hhc.index)
+        self.db.commit()
+        ####Lock Placeholder####
+        self.add_stage_time("commit", start)
+
+        # Pipe the hand.id out to the HUD
+        if to_hud and self.auto_import:
+            if self.zmq_sender is None:
+                self.zmq_sender = ZMQSender()
 
-                        self.zmq_sender.send_hand_id(hand_id)
-                    except IOError as e:
-                        log.error(f"Failed to send hand ID to HUD via socket: {e}")
+            for hand_id in to_hud:
+                try:
+                    log.debug(f"Sending hand ID {hand_id} to HUD via socket")
 
-        stored -= duplicates
+                    self.zmq_sender.send_hand_id(hand_id)
+                except IOError as e:
+                    log.error(f"Failed to send hand ID to HUD via socket: {e}")
 
         return stored, duplicates, errors
 
+    def insert_hands(self, hand_list):
+        # HandPlayers and HandActions rows of the hands are written with one executemany each,
+        # the Hands rows are still inserted one at a time to get their ids.
+        # HudCache gets one upsert per (gameTypeId, playerId, seats). Returns the ids of the hands
+        start = perf_counter()
+        hand_ids = []
+        hand_players_data = []
+        hand_actions_data = []
+
+        try:
+            for hand in hand_list:
+                hand.id = self.db.insert_hand(hand.hand)
+                hand_players_data += self.db.get_hand_players_data(hand.id, hand.players_ids, hand.hand_players)
+                hand_actions_data += self.db.get_hand_actions_data(hand.id, hand.players_ids, hand.hand_actions)
+                self.db.add_hud_cache(hand.game_type_id, hand.players_ids, hand.hand_players)
+
+                if hand.hero in hand.won_bounty:
+                    self.db.update_tourney_bounties([hand.won_bounty[hand.hero], hand.tourney_id])
+
+                hand_ids.append(hand.id)
+
+            self.db.insert_hand_players(hand_players_data)
+            self.db.insert_hand_actions(hand_actions_data)
+            self.add_stage_time("insert", start)
+
+            start = perf_counter()
+            self.db.flush_hud_cache()
+            self.add_stage_time("hudcache", start)
+        finally:
+            self.db.hud_cache_deltas = {}
+
+        return hand_ids
+
     def import_summary_file(self, f, hero_name):
         stored, duplicates, errors = 0, 0, 0
+        start = perf_counter()
 
         log.info(f"Converting {f.path}")
 
         try:
-            tsc = PokerStarsSummary.PokerStarsSummary(f.path, hero_name)
+            tsc = PokerStarsSummary.PokerStarsSummary(f.path, hero_name, f.open if f.archive is not None else None)
             tourney_id = self.db.get_tourney_id(tsc.tour_no)
 
-            if tourney_id == 0:
-                log.error(f"Tourney {tsc.tour_no} does not exists")
-                raise FpdbParseError
-
             stored = 1
         except FpdbParseError:
             log.error(f"Summary import parse error in file: {f.path}")
@@ -280,53 +765,134 @@ class Importer(object):
             if self.parent:
                 self.progress_notify()
 
-            data = [tsc.entries, tsc.prize_pool, tsc.start_time, tsc.rank, tsc.winnings, tourney_id]
+            data = [tsc.entries, self.db.money(tsc.prize_pool), tsc.start_time, tsc.rank, self.db.money(tsc.winnings)]
 
-            self.db.update_tourney(data)
-            self.db.commit()
+            if tourney_id == 0:
+                # Applied by Database.insert_tourney once the hands of the tourney are imported
+                log.info(f"Tourney {tsc.tour_no} not imported yet, its summary is kept until it is")
+
+                self.db.insert_pending_summaries([[tsc.tour_no, *data, f.id]])
+            else:
+                self.db.update_tourney([*data, tourney_id])
+
+        # A summary which failed is read again by the next import
+        self.log_import(stored, duplicates, errors, f, f.get_read_size() if stored > 0 else 0)
+        self.db.commit()
+
+        self.add_stage_time("summary", start)
 
         return stored, duplicates, errors
 
-    def progress_notify(self):
-        QCoreApplication.processEvents()
+    def import_summary_files(self, files, executor=None):
+        # Batch summary mode of the bulk import: the summaries are parsed in the executor processes
+        # when there's one, the tourney ids are read with one query and the tourneys are updated
+        # with one executemany, all in a single transaction. The summaries of the tourneys which
+        # aren't imported yet are kept in PendingSummaries
+        stored, duplicates, errors = 0, 0, 0
+        start = perf_counter()
+        parsed = []
 
-    def __del__(self):
-        if self.zmq_sender is not None:
-            self.zmq_sender.close()
+        for f in files:
+            log.info(f"Converting {f.path}")
 
-class ImportProgressDialog(QDialog):
-    # Popup window to show progress
-    # Init method sets up total number of expected iterations
-    # If no parent is passed to init, command line
-    # mode assumed, and does not create a progress bar
-    def __init__(self, total, parent):
-        if parent is None:
-            return
-        super().__init__(parent)
-        self.fraction = 0
-        self.total = total
-        self.p_bar = QProgressBar()
-        self.p_text = QLabel()
+            args = (f.path, self.db.hero_name, f.open if f.archive is not None else None)
+
+            if executor is not None:
+                parsed.append((f, executor.submit(PokerStarsSummary.PokerStarsSummary, *args)))
+            else:
+                parsed.append((f, args))
+
+        summaries = []
+
+        for f, tsc in parsed:
+            try:
+                if isinstance(tsc, Future):
+                    tsc = tsc.result()
+                else:
+                    tsc = PokerStarsSummary.PokerStarsSummary(*tsc)
+            except FpdbParseError:
+                log.error(f"Summary import parse error in file: {f.path}")
+                tsc = None
 
-        self.setWindowTitle("Importing")
-        self.p_bar.setRange(0, total)
-        self.p_text.setWordWrap(True)
+            summaries.append((f, tsc))
 
-        box = QVBoxLayout()
-        box.addWidget(self.p_bar)
-        box.addWidget(self.p_text)
+        tourney_ids = self.db.get_tourney_ids({tsc.tour_no for f, tsc in summaries if tsc is not None})
+        data = []
+        pending = []
 
-        self.setLayout(box)
+        for f, tsc in summaries:
+            # A summary which failed is read again by the next import
+            if tsc is None:
+                errors += 1
+                self.log_import(0, 0, 1, f, 0)
+                continue
 
-    def progress_update(self, file):
-        self.fraction += 1
+            if tsc.tour_no in tourney_ids:
+                data.append([tsc.entries, self.db.money(tsc.prize_pool), tsc.start_time, tsc.rank, self.db.money(tsc.winnings), tourney_ids[tsc.tour_no]])
+            else:
+                log.info(f"Tourney {tsc.tour_no} not imported yet, its summary is kept until it is")
 
-        # update total if fraction exceeds expected total number of iterations
-        if self.fraction > self.total:
-            self.total = self.fraction
-            self.p_bar.setRange(0, self.total)
+                pending.append([tsc.tour_no, tsc.entries, self.db.money(tsc.prize_pool), tsc.start_time, tsc.rank, self.db.money(tsc.winnings), f.id])
 
-        self.p_bar.setValue(self.fraction)
+            stored += 1
+            self.log_import(1, 0, 0, f, f.get_read_size())
+
+        self.db.update_tourneys(data)
+        self.db.insert_pending_summaries(pending)
+        self.db.commit()
+
+        if self.parent:
+            self.progress_notify()
+
+        self.add_stage_time("summary", start)
+
+        return stored, duplicates, errors
+
+    def add_stage_time(self, stage, start):
+        self.add_stage_seconds(stage, perf_counter() - start)
+
+    def add_stage_seconds(self, stage, seconds):
+        # See STAGES
+        with self.stage_times_lock:
+            self.stage_times[stage] = self.stage_times.get(stage, 0) + seconds
+
+    def reset_metrics(self):
+        self.stage_times = {}
+        self.counters = {"hands": 0, "bytes": 0}
+        self.metrics_start = perf_counter()
+        self.commit_retries = self.db.commit_retries
+
+    def get_metrics(self):
+        # Metrics since reset_metrics, as lines of text
+        elapsed = perf_counter() - self.metrics_start
+        hands = self.counters["hands"]
+        lines = [
+            f"{hands} hands in {elapsed:.2f}s, {hands / elapsed if elapsed else 0:.1f} hands/sec, "
+            f"{self.counters['bytes'] / 1024:.0f} KB read, {self.db.commit_retries - self.commit_retries} commit retries"
+        ]
+
+        stages = [f"{stage} {1000 * self.stage_times[stage] / hands if hands else 0:.2f}" for stage in STAGES if stage in self.stage_times]
+
+        if stages:
+            lines.append(f"ms/hand: {', '.join(stages)}")
+
+        # Since the connection opened, to size player_cache_size and tourney_cache_size
+        caches = []
+
+        for name, (size, maxsize, hits, misses, evictions) in self.db.get_cache_stats().items():
+            caches.append(f"{name} {size}/{maxsize}, {100 * hits / (hits + misses) if hits + misses else 0:.1f}% hits, {evictions} evicted")
+
+        lines.append(f"id caches: {'; '.join(caches)}")
+
+        return lines
+
+    def progress_notify(self):
+        from PyQt5.QtCore import QCoreApplication
+
+        QCoreApplication.processEvents()
+
+    def __del__(self):
+        if self.zmq_sender is not None:
+            self.zmq_sender.close()
 
-        now = datetime.now().strftime("%H:%M:%S")
-        self.p_text.setText(f"{now} - Importing {file}\n")
+        self.close_watcher()
@@ -28,8 +28,9 @@ RE_DATE_TIME = re.compile(r"(?P<Y>\d{4})\/(?P<M>\d{2})\/(?P<D>\d{2})[\- ]+(?P<H>
 RE_PLAYER = re.compile(r"(?P<RANK>\d+):\s%(PLYR)s(\s\[\d+\])?\s\(.+,\s((?P<LS>%(LS)s)(?P<WINNINGS>[.\d]+))?" % SUBSTITUTIONS)
 
 class PokerStarsSummary(object):
-    def __init__(self, file, hero_name):
+    def __init__(self, file, hero_name, open_file=None):
         self.file = file
+        self.open_file = open_file  # returns a binary stream, for the files which aren't plain files (archive members)
         self.hero_name = hero_name
         self.file_text = None
         self.tour_no = None
@@ -47,9 +48,13 @@ class PokerStarsSummary(object):
 
     def read_file(self):
         try:
-            with codecs.open(self.file, "r", "utf-8") as file_reader:
-                whole_file = file_reader.read().replace("\r\n", "\n").replace("\xa0", " ")
-                file_reader.close()
+            if self.open_file is not None:
+                with self.open_file() as file_reader:
+                    whole_file = file_reader.read().decode("utf-8").replace("\r\n", "\n").replace("\xa0", " ")
+            else:
+                with codecs.open(self.file, "r", "utf-8") as file_reader:
+                    whole_file = file_reader.read().replace("\r\n", "\n").replace("\xa0", " ")
+                    file_reader.close()
 
             self.file_text = whole_file.rstrip()
         except Exception as e:
@@ -1,8 +1,11 @@
 import codecs
 from decimal import Decimal
 import logging
+import logging.handlers
 import re
+from time import perf_counter
 
+import Database
 from Exceptions import FpdbParseError
 import Hand
 import PokerStarsStructures
@@ -17,7 +20,9 @@ SUBSTITUTIONS = {
 }
 LIMITS = {"No Limit": "nl"}
 GAMES = {"Hold'em": "hold"}
+READ_BLOCK_SIZE = 1 << 19  # bytes read at a time by read_hand_batches
 RE_SPLIT_HANDS = re.compile("(?:\s?\n){2,}")
+RE_HAND_NO = re.compile(r"PokerStars\s(?:Game|Hand)\s\#(?P<HID>\d+):")
 RE_GAME_INFO = re.compile(
     r"""
         PokerStars\s(?:Game|Hand)\s\#(?P<HID>\d+):\s
@@ -48,46 +53,108 @@ RE_COLLECTED = re.compile(r"%(PLYR)s\scollected\s(?:%(LS)s)?(?P<POT>[.\d]+)\sfro
 # Berry67 wins €0.23 for splitting the elimination of Iroshi1 and their own bounty increases by €0.22 to €1.12
 RE_BOUNTY = re.compile(r"%(PLYR)s\swins\s%(LS)s(?P<BOUNTY>[.\d]+)\sfor\s(splitting\sthe\selimination\sof|eliminating)\s.+?\sand\stheir\sown\sbounty\sincreases\sby\s%(LS)s[.\d]+\sto\s%(LS)s(?P<ENDBOUNTY>[.\d]+)" % SUBSTITUTIONS)
 RE_SHOWN_CARDS = re.compile(r"Seat\s\d+:\s%(PLYR)s\s((\(button\)|\(small\sblind\)|\(big\sblind\)|\(button\)\s\(small\sblind\))\s)?(showed|mucked)\s\[(?P<CARDS>.*)\]" % SUBSTITUTIONS)
+# Used by read_lines: the street marker lines, up to where the text of the street starts in mark_streets
+RE_FLOP_MARKER = re.compile(r"\*\*\* FLOP \*\*\*( (?:\[\S\S\] )?\[(?:\S\S ?)?\S\S \S\S\])")
+RE_TURN_MARKER = re.compile(r"\*\*\* TURN \*\*\* \[\S\S \S\S \S\S\] (\[\S\S\])")
+RE_RIVER_MARKER = re.compile(r"\*\*\* RIVER \*\*\* \[\S\S \S\S \S\S\]? \[?\S\S\] (\[\S\S\])")
+# Used by mark_streets: where a street can end at the marker of the next one, and where the next one starts
+RE_NEXT_STREET = re.compile(r".", re.DOTALL)
+RE_FLOP_START = re.compile(r"\*\*\* FLOP \*\*\*")
+RE_FLOP_CARDS = re.compile(r" (\[\S\S\] )?\[(\S\S ?)?\S\S \S\S\].", re.DOTALL)
+RE_TURN_START = re.compile(r"\*\*\* TURN \*\*\* \[\S\S \S\S \S\S\] ")
+RE_TURN_CARD = re.compile(r"\[\S\S\].", re.DOTALL)
+RE_RIVER_START = re.compile(r"\*\*\* RIVER \*\*\* \[\S\S \S\S \S\S\]? \[?\S\S\] (?=\[\S\S\].)", re.DOTALL)
+STREET_SPLITS = (
+    ("PREFLOP", "*** FLOP ***", RE_NEXT_STREET, RE_FLOP_START),
+    ("FLOP", "*** TURN ***", RE_FLOP_CARDS, RE_TURN_START),
+    ("TURN", "*** RIVER ***", RE_TURN_CARD, RE_RIVER_START)
+)
+RE_ACTION_VERB = re.compile(r": (?:bets|checks|raises|calls|folds)")
+# The regexes above take any whitespace for \s, a newline included, so with odd whitespace or where a line
+# ends or starts like the middle of a match, a match could run over two lines and read_lines could miss it
+RE_UNSAFE_TEXT = re.compile(
+    r"""
+        [^\S\n\x20]
+        |\n(?:
+            (?<=:\n)|(?<=\sto\n)|(?<=\sof\n)|(?<=\seliminating\n)
+            |(?<=[A-Za-z',]\n)[\u20ac.\d]
+            |[(\[']
+            |all.in
+            |(?:in|chips|bounty|is|sitting|out|of|hand|posts|the|ante|small|big|blind|to|bets|checks|raises|calls|folds|and|bet
+                |returned|collected|from|side|main|pot|wins|for|splitting|eliminating|elimination|their|own|increases|by|showed|mucked)\b
+        )
+    """,
+    re.VERBOSE
+)
+# False parses every hand with the full text readers, they are kept as the reference for read_lines,
+# check_line_tokenizer.py compares the two
+LINE_TOKENIZER = True
 
 class PokerStars(object):
-    def __init__(self, file, index, auto_pop):
+    def __init__(self, file, index, get_duplicate_hands, hands_list, integer_money=False):
         self.file = file
         self.index = index
-        self.auto_pop = auto_pop
+        self.get_duplicate_hands = get_duplicate_hands
+        self.integer_money = integer_money  # the hands get integer amounts, see Hand
         self.processed_hands = []
         self.num_hands = 0
         self.num_errors = 0
+        self.num_duplicates = 0
+        self.game_info = None  # RE_GAME_INFO match of the hand being parsed
+        self.read_time = 0  # seconds, reported in the import metrics
+        self.parse_time = 0
+        self.stats_time = 0
 
-        self.start()
+        self.start(hands_list)
 
-    def start(self):
-        # Process a hand at a time from the input specified by file
-        hands_list = self.get_hands_list()
+    def start(self, hands_list):
+        # Process the hand texts of one block of the file (see read_hand_batches)
+        start = perf_counter()
+
+        if self.get_duplicate_hands is not None:
+            hands_list = self.skip_duplicate_hands(hands_list)
 
         log.info(f"Parsing {len(hands_list)} hands")
 
+        self.processed_hands = list(self.iter_hands(hands_list))
+        self.game_info = None  # the result is pickled back from the parser processes
+        self.num_hands = len(hands_list) + self.num_duplicates
+        self.parse_time = perf_counter() - start
+
+        log.info(f"Read {self.num_hands} hands ({self.num_errors} failed, {self.num_duplicates} duplicates)")
+
+    def iter_hands(self, hands_list):
+        # Yields the hands one at a time as they are parsed, the ones which fail are counted in num_errors
         for hand_text in hands_list:
             try:
-                self.processed_hands.append(self.process_hand(hand_text))
+                yield self.process_hand(hand_text)
             except FpdbParseError:
                 self.num_errors += 1
                 log.error(f"FpdbParseError for file '{self.file}'")
 
-        self.num_hands = len(hands_list)
-
-        log.info(f"Read {self.num_hands} hands ({self.num_errors} failed)")
+    def skip_duplicate_hands(self, hands_list):
+        # Header-only pre-scan: only the hand number is read from the first line of each hand,
+        # the hands already stored or repeated in the file are dropped before they are parsed.
+        # Hands without a readable header are kept, process_hand will report them.
+        hand_nos = []
 
-    def get_hands_list(self):
-        # Return a list of hand_texts in the file at self.file
-        self.read_file()
+        for hand_text in hands_list:
+            m = RE_HAND_NO.search(hand_text.partition("\n")[0])
+            hand_nos.append(int(m.group("HID")) if m else None)
 
-        if self.obs is None or self.obs == "":
-            log.info(f"Read no hands from file: '{self.file}'")
-            return []
+        known_hands = self.get_duplicate_hands([hand_no for hand_no in hand_nos if hand_no is not None])
+        result = []
 
-        hand_list = re.split(RE_SPLIT_HANDS, self.obs)
+        for hand_no, hand_text in zip(hand_nos, hands_list):
+            if hand_no is None:
+                result.append(hand_text)
+            elif hand_no in known_hands:
+                self.num_duplicates += 1
+            else:
+                known_hands.add(hand_no)
+                result.append(hand_text)
 
-        return hand_list
+        return result
 
     def process_hand(self, hand_text):
         game_type = self.determine_game_type(hand_text)
@@ -105,17 +172,6 @@ class PokerStars(object):
         log.error(f"Unsupported game type: {game_type}")
         raise FpdbParseError
 
-    def read_file(self):
-        try:
-            with codecs.open(self.file, "r", "utf-8") as file_reader:
-                whole_file = file_reader.read().replace("\r\n", "\n").replace("\xa0", " ")
-                file_reader.close()
-
-            self.obs = whole_file[self.index :].rstrip()
-            self.index = len(whole_file)
-        except Exception as e:
-            log.error(f"Failed to read file {self.file}: {e}")
-
     def read_supported_games(self):
         return [["hold", "nl"]]
 
@@ -129,6 +185,8 @@ class PokerStars(object):
                 log.error(f"PokerStarsToFpdb.determine_game_type: '{self.file}'")
                 raise FpdbParseError
 
+            # Kept for read_lines, which doesn't search the hand text for it again
+            self.game_info = m
             mg = m.groupdict()
 
             info["limitType"] = LIMITS[mg["LIMIT"]]
@@ -150,13 +208,120 @@ class PokerStars(object):
             log.error(f"PokerStarsToFpdb.determine_game_type: '{e}'")
             raise FpdbParseError
 
+    def read_lines(self, hand):
+        # Single pass engine, HoldemHand uses it before the readers below: every line of the hand is
+        # classified with substring checks and only the lines which can hold a match are given to
+        # the regexes, the matches are then added in the order of the readers. So the hand gets the
+        # same callbacks as from the readers, which search the whole text once for each regex.
+        # Returns False, before any callback, for the hands where the two could differ (see
+        # RE_UNSAFE_TEXT, street markers mark_streets wouldn't split the same way), the readers
+        # parse them.
+        if not LINE_TOKENIZER or RE_UNSAFE_TEXT.search(hand.hand_text):
+            return False
+
+        lines = hand.hand_text.split("\n")
+        last = len(lines) - 1
+        table = button = small_blind = hero = None
+        players, antes, big_blinds, bounties, shown_cards = [], [], [], [], []
+        streets, boards, actions, uncalled, collected = [], {}, {}, {}, {}
+        street = None
+
+        for i, line in enumerate(lines):
+            if "***" in line:
+                m = None
+
+                if street is None and line == "*** HOLE CARDS ***":
+                    street = "PREFLOP"
+                elif street == "PREFLOP" and (m := RE_FLOP_MARKER.fullmatch(line)):
+                    street = "FLOP"
+                elif street == "FLOP" and (m := RE_TURN_MARKER.fullmatch(line)):
+                    street = "TURN"
+                elif street == "TURN" and (m := RE_RIVER_MARKER.fullmatch(line)):
+                    street = "RIVER"
+                elif line == "*** SHOW DOWN ***" or line == "*** SUMMARY ***":
+                    continue
+                else:
+                    return False
+
+                if i == last:
+                    return False
+
+                if m:
+                    boards[street] = RE_BOARD.search(line, m.start(1))
+
+                streets.append(street)
+                actions[street] = []
+                uncalled[street] = None
+                collected[street] = []
+                continue
+
+            if "in chips" in line:
+                players += RE_PLAYER_INFO.finditer(line)
+
+            if table is None and "Table '" in line:
+                table = RE_HAND_INFO.search(line)
+
+            if button is None and "is the button" in line:
+                button = RE_BUTTON.search(line)
+
+            if ": posts " in line:
+                if ": posts the ante " in line:
+                    antes += RE_ANTES.finditer(line)
+
+                if small_blind is None and ": posts small blind " in line:
+                    small_blind = RE_POST_SB.search(line)
+
+                if ": posts big blind " in line:
+                    big_blinds += RE_POST_BB.finditer(line)
+
+            if street is not None:
+                if RE_ACTION_VERB.search(line):
+                    actions[street] += RE_ACTION.finditer(line)
+
+                if street == "PREFLOP" and hero is None and "Dealt to " in line:
+                    hero = RE_HERO_CARDS.search(line)
+
+                if uncalled[street] is None and "Uncalled bet (" in line:
+                    uncalled[street] = RE_UNCALLED.search(line)
+
+                if " collected " in line:
+                    collected[street] += RE_COLLECTED.finditer(line)
+
+            if " own bounty increases " in line:
+                bounties += RE_BOUNTY.finditer(line)
+
+            if "showed [" in line or "mucked [" in line:
+                shown_cards += RE_SHOWN_CARDS.finditer(line)
+
+        if street is None or button is None or hero is None:
+            # mark_streets, read_button or read_hole_cards fail, the readers report it
+            return False
+
+        self.add_hand_info(hand, self.game_info, table)
+        hand.button_pos = int(button.group("BUTTON"))
+        self.add_players(hand, players)
+        self.add_antes(hand, antes)
+        self.add_blinds(hand, small_blind, big_blinds)
+        self.add_hole_cards(hand, hero)
+
+        for street in streets[1:]:
+            hand.set_community_cards(street, boards[street].group("CARDS").split(" "))
+
+        for street in streets:
+            self.add_actions(hand, street, actions[street], uncalled[street], collected[street])
+
+        self.add_bounties(hand, bounties)
+        self.add_shown_cards(hand, shown_cards)
+
+        return True
+
     def read_hand_info(self, hand):
+        self.add_hand_info(hand, RE_GAME_INFO.search(hand.hand_text), RE_HAND_INFO.search(hand.hand_text))
+
+    def add_hand_info(self, hand, m, m2):
         info = {}
 
         try:
-            m = RE_GAME_INFO.search(hand.hand_text)
-            m2 = RE_HAND_INFO.search(hand.hand_text)
-
             if m is None or m2 is None:
                 log.error(f"PokerStarsToFpdb.read_hand_info: '{self.file}'")
                 raise FpdbParseError
@@ -217,7 +382,10 @@ class PokerStars(object):
         hand.button_pos = int(m.group("BUTTON"))
 
     def read_player_stacks(self, hand):
-        for m in RE_PLAYER_INFO.finditer(hand.hand_text):
+        self.add_players(hand, RE_PLAYER_INFO.finditer(hand.hand_text))
+
+    def add_players(self, hand, matches):
+        for m in matches:
             if (hand.game_type["type"] == "tour" and m.group("OUTHAND") is None) or (hand.game_type["type"] == "cash" and m.group("SITOUT") is None):
                 hand.add_player(
                     int(m.group("SEAT")),
@@ -228,30 +396,58 @@ class PokerStars(object):
                 )
 
     def mark_streets(self, hand):
-        # PREFLOP = ** Dealing down cards **
-        m = re.search(
-            r"\*\*\* HOLE CARDS \*\*\*(?P<PREFLOP>.+(?=\*\*\* FLOP \*\*\*)|.+)"
-            r"(\*\*\* FLOP \*\*\*(?P<FLOP> (\[\S\S\] )?\[(\S\S ?)?\S\S \S\S\].+(?=\*\*\* TURN \*\*\*)|.+))?"
-            r"(\*\*\* TURN \*\*\* \[\S\S \S\S \S\S\] (?P<TURN>\[\S\S\].+(?=\*\*\* RIVER \*\*\*)|.+))?"
-            r"(\*\*\* RIVER \*\*\* \[\S\S \S\S \S\S\]? \[?\S\S\] (?P<RIVER>\[\S\S\].+))?",
-            hand.hand_text,
-            re.DOTALL
-        )
+        # Stores the (start, end) span of each street in hand_text, the streets are split the way
+        # this regex did it, but the markers are found by offset instead of by backtracking:
+        #   \*\*\* HOLE CARDS \*\*\*(?P<PREFLOP>.+(?=\*\*\* FLOP \*\*\*)|.+)
+        #   (\*\*\* FLOP \*\*\*(?P<FLOP> (\[\S\S\] )?\[(\S\S ?)?\S\S \S\S\].+(?=\*\*\* TURN \*\*\*)|.+))?
+        #   (\*\*\* TURN \*\*\* \[\S\S \S\S \S\S\] (?P<TURN>\[\S\S\].+(?=\*\*\* RIVER \*\*\*)|.+))?
+        #   (\*\*\* RIVER \*\*\* \[\S\S \S\S \S\S\]? \[?\S\S\] (?P<RIVER>\[\S\S\].+))?  (DOTALL)
+        # A street ends at the last marker of the next street when it starts like its regex above,
+        # else it runs to the end of the text
+        text = hand.hand_text
+        end = len(text)
+        start = text.find("*** HOLE CARDS ***")
+        spans = {"PREFLOP": None, "FLOP": None, "TURN": None, "RIVER": None}
+
+        if start >= 0:
+            start += len("*** HOLE CARDS ***")
+
+            for street, marker, cards, next_start in STREET_SPLITS:
+                next_marker = text.rfind(marker, start)
+
+                if next_marker >= 0 and cards.match(text, start, next_marker):
+                    spans[street] = (start, next_marker)
+                    m = next_start.match(text, next_marker)
+
+                    if m is None:
+                        break
+
+                    start = m.end()
+                else:
+                    if start < end:
+                        spans[street] = (start, end)
+
+                    break
+            else:
+                spans["RIVER"] = (start, end)
 
-        hand.add_streets(m)
+        hand.add_streets(spans if spans["PREFLOP"] else None)
 
     def read_community_cards(self, hand, street):
-        m = RE_BOARD.search(hand.streets[street])
+        m = RE_BOARD.search(hand.hand_text, *hand.streets[street])
         hand.set_community_cards(street, m.group("CARDS").split(" "))
 
     def read_antes(self, hand):
-        for m in RE_ANTES.finditer(hand.hand_text):
+        self.add_antes(hand, RE_ANTES.finditer(hand.hand_text))
+
+    def add_antes(self, hand, matches):
+        for m in matches:
             hand.add_ante(m.group("PNAME"), m.group("ANTE"))
 
     def read_blinds(self, hand):
-        m = RE_POST_SB.search(hand.hand_text)
-        m2 = RE_POST_BB.finditer(hand.hand_text)
+        self.add_blinds(hand, RE_POST_SB.search(hand.hand_text), RE_POST_BB.finditer(hand.hand_text))
 
+    def add_blinds(self, hand, m, m2):
         if m:
             hand.add_blind(m.group("PNAME"), "small blind", m.group("SB"))
 
@@ -260,7 +456,9 @@ class PokerStars(object):
 
     def read_hole_cards(self, hand):
         street = "PREFLOP"
-        m = RE_HERO_CARDS.search(hand.streets[street])
+        self.add_hole_cards(hand, RE_HERO_CARDS.search(hand.hand_text, *hand.streets[street]))
+
+    def add_hole_cards(self, hand, m):
         hand.hero = m.group("PNAME")
         cards = m.group("CARDS").split(" ")
         hand.add_hole_cards(hand.hero, cards)
@@ -269,8 +467,18 @@ class PokerStars(object):
         if not hand.streets[street]:
             return
 
-        m = RE_ACTION.finditer(hand.streets[street])
+        # The searches stop at the end of the street, $ matches there as at the end of a string
+        start, end = hand.streets[street]
+
+        self.add_actions(
+            hand,
+            street,
+            RE_ACTION.finditer(hand.hand_text, start, end),
+            RE_UNCALLED.search(hand.hand_text, start, end),
+            RE_COLLECTED.finditer(hand.hand_text, start, end)
+        )
 
+    def add_actions(self, hand, street, m, m2, m3):
         for action in m:
             if action.group("ATYPE") == " folds":
                 hand.add_fold(street, action.group("PNAME"))
@@ -285,26 +493,150 @@ class PokerStars(object):
             else:
                 raise FpdbParseError(f"Unimplemented read_action: '{action.group('PNAME')}' '{action.group('ATYPE')}'")
 
-        m = RE_UNCALLED.search(hand.streets[street])
-
-        if m:
-            hand.add_uncalled(street, m.group("PNAME"), m.group("BET"))
-
-        m = RE_COLLECTED.finditer(hand.streets[street])
+        if m2:
+            hand.add_uncalled(street, m2.group("PNAME"), m2.group("BET"))
 
-        for action in m:
+        for action in m3:
             hand.add_collected(street, action.group("PNAME"), action.group("POT"))
 
     def read_bounty(self, hand):
-        for m in RE_BOUNTY.finditer(hand.hand_text):
+        self.add_bounties(hand, RE_BOUNTY.finditer(hand.hand_text))
+
+    def add_bounties(self, hand, matches):
+        for m in matches:
             if m.group("PNAME") not in hand.won_bounty:
                 hand.won_bounty[m.group("PNAME")] = 0
 
-            hand.won_bounty[m.group("PNAME")] += Decimal(m.group("BOUNTY"))
-            hand.end_bounty[m.group("PNAME")] = Decimal(m.group("ENDBOUNTY"))
+            hand.won_bounty[m.group("PNAME")] += hand.currency_amount(m.group("BOUNTY"))
+            hand.end_bounty[m.group("PNAME")] = hand.currency_amount(m.group("ENDBOUNTY"))
 
     def read_shown_cards(self, hand):
-        for m in RE_SHOWN_CARDS.finditer(hand.hand_text):
+        self.add_shown_cards(hand, RE_SHOWN_CARDS.finditer(hand.hand_text))
+
+    def add_shown_cards(self, hand, matches):
+        for m in matches:
             cards = m.group("CARDS").split(" ")
 
             hand.add_hole_cards(m.group("PNAME"), cards)
+
+def read_hand_batches(file_reader, index, complete_only=False):
+    # Reader stage of the bulk import pipeline: reads the binary stream file_reader (a file or an
+    # archive member) from the byte offset index one block at a time and yields (hand_texts, index)
+    # with the complete hands of each block and the byte offset after them, memory use doesn't
+    # depend on the size of the file.
+    # With complete_only the text after the last separator isn't read, PokerStars may still be writing it.
+    # Without it the text is parsed, but the byte offset stays before it, so it's read again next time
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    text = ""
+
+    file_reader.seek(index)
+
+    while True:
+        data = file_reader.read(READ_BLOCK_SIZE)
+        text += decoder.decode(data, final=not data and not complete_only)
+
+        if data:
+            # The hand after the last separator may continue in the next block
+            end = 0
+
+            for m in RE_SPLIT_HANDS.finditer(text):
+                end = m.end()
+
+            if end == 0:
+                continue
+
+            done, text = text[:end], text[end:]
+        elif complete_only:
+            break
+        else:
+            done, text = text, ""
+
+        # A hand at the end of the file without a separator may be incomplete, it isn't counted as read
+        if data or not done.strip():
+            index += len(done.encode("utf-8"))
+        done = done.replace("\r\n", "\n").replace("\xa0", " ").strip()
+
+        if done:
+            yield re.split(RE_SPLIT_HANDS, done), index
+
+        if not data:
+            break
+
+# Set by init_parser_process in the bulk import parser processes
+hands_reader = None
+
+def init_parser_process(db_path, log_queue, log_level):
+    # Initializer of the bulk import parser processes. Their log records are queued to the importer,
+    # which writes them with its handlers, only one process opens the log files (see Importer.LogForwarder).
+    # With db_path a read only connection lets them skip the hands which are already stored without parsing them
+    global hands_reader
+
+    root = logging.getLogger()
+
+    for logger in [root, *root.manager.loggerDict.values()]:
+        if isinstance(logger, logging.Logger):
+            # Inherited from the importer when the process is forked
+            for handler in logger.handlers[:]:
+                logger.removeHandler(handler)
+
+            if logger is not root:
+                logger.setLevel(logging.NOTSET)
+                logger.propagate = True
+
+    root.addHandler(logging.handlers.QueueHandler(log_queue))
+    root.setLevel(log_level)
+
+    if db_path is None:
+        return
+
+    try:
+        hands_reader = Database.HandsReader(db_path)
+    except Exception as e:
+        log.warning(f"Parser process can't read the database, duplicate hands will be parsed: {e}")
+
+def parse_file(file, index, get_duplicate_hands, hands_list, integer_money=False):
+    # Entry point of the bulk import parser processes, also used in-process by the serial import and
+    # iter_file. Parses hands_list, a batch from read_hand_batches, index is only passed through.
+    # Builds everything which doesn't need a database id, so the caller is only left with
+    # prep_insert, assemble_hand and the writes. The hand texts are dropped to keep the result
+    # small when it's pickled back to the writer.
+    # get_duplicate_hands (Database.get_duplicate_hands) is used to skip the hands which are already
+    # stored, or repeated in the file, before they are parsed. They are counted in num_duplicates.
+    # integer_money is Database.integer_money of the database the hands are written to.
+    if get_duplicate_hands is None and hands_reader is not None:
+        get_duplicate_hands = hands_reader.get_duplicate_hands
+
+    hhc = PokerStars(file, index, get_duplicate_hands, hands_list, integer_money)
+    hhc.get_duplicate_hands = None
+    start = perf_counter()
+
+    for hand in hhc.processed_hands:
+        hand.assemble_hand_players()
+        hand.assemble_hand_actions()
+        hand.hand_text = None
+        hand.streets = None
+
+    hhc.stats_time = perf_counter() - start
+
+    return hhc
+
+def iter_file(file, index, auto_pop, get_duplicate_hands=None, integer_money=False):
+    # Streaming parser of the auto import: yields the parse_file result of each block of the file
+    # read from the byte offset index, only one block of hands is held at a time.
+    # With auto_pop the incomplete hand PokerStars may be writing is left for the next call
+    with open(file, "rb") as file_reader:
+        batches = read_hand_batches(file_reader, index, auto_pop)
+
+        while True:
+            start = perf_counter()
+            batch = next(batches, None)
+            read_time = perf_counter() - start
+
+            if batch is None:
+                break
+
+            hand_texts, index = batch
+            hhc = parse_file(file, index, get_duplicate_hands, hand_texts, integer_money)
+            hhc.read_time = read_time
+
+            yield hhc
@@ -7,7 +7,12 @@ class Sql(object):
         ####################################
 
         self.query["listTables"] = "SELECT name FROM sqlite_master WHERE type = 'table' ORDER BY name"
+        self.query["listIndexes"] = "SELECT name FROM sqlite_master WHERE type = 'index' ORDER BY name"
+        self.query["getSchemaVersion"] = "PRAGMA schema_version"
         self.query["dropTable"] = "DROP TABLE IF EXISTS "
+        self.query["savepoint"] = "SAVEPOINT <name>"
+        self.query["rollbackToSavepoint"] = "ROLLBACK TO SAVEPOINT <name>"
+        self.query["releaseSavepoint"] = "RELEASE SAVEPOINT <name>"
 
         ####################################
         # Create Files
@@ -22,7 +27,18 @@ class Sql(object):
                     stored INTEGER,
                     duplicates INTEGER,
                     errors INTEGER,
-                    finished INTEGER)"""
+                    finished INTEGER,
+                    byteOffset INTEGER NOT NULL DEFAULT 0,
+                    fileSize INTEGER,
+                    fileMtime REAL,
+                    prefixHash TEXT)"""
+
+        # Upgrade of the Files tables created before byteOffset and the fingerprint columns
+        self.query["getFilesColumns"] = "PRAGMA table_info(Files)"
+        self.query["addFilesByteOffset"] = "ALTER TABLE Files ADD COLUMN byteOffset INTEGER NOT NULL DEFAULT 0"
+        self.query["addFilesFileSize"] = "ALTER TABLE Files ADD COLUMN fileSize INTEGER"
+        self.query["addFilesFileMtime"] = "ALTER TABLE Files ADD COLUMN fileMtime REAL"
+        self.query["addFilesPrefixHash"] = "ALTER TABLE Files ADD COLUMN prefixHash TEXT"
 
         ####################################
         # Create GameTypes
@@ -32,8 +48,8 @@ class Sql(object):
                     id INTEGER PRIMARY KEY NOT NULL,
                     type TEXT NOT NULL,
                     currency TEXT NOT NULL,
-                    smallBlind REAL NOT NULL,
-                    bigBlind REAL NOT NULL,
+                    smallBlind <money> NOT NULL,
+                    bigBlind <money> NOT NULL,
                     maxSeats INTEGER NOT NULL,
                     ante INTEGER NOT NULL)"""
 
@@ -53,11 +69,11 @@ class Sql(object):
         self.query["createTourneyTypesTable"] = """CREATE TABLE TourneyTypes (
                     id INTEGER PRIMARY KEY NOT NULL,
                     currency TEXT NOT NULL,
-                    buyIn REAL NOT NULL,
-                    fee REAL NOT NULL,
+                    buyIn <money> NOT NULL,
+                    fee <money> NOT NULL,
                     maxSeats INTEGER NOT NULL,
                     knockout INTEGER NOT NULL,
-                    koBounty REAL,
+                    koBounty <money>,
                     speed TEXT NOT NULL,
                     private INTEGER NOT NULL,
                     sng INTEGER NOT NULL)"""
@@ -71,11 +87,11 @@ class Sql(object):
                     tourneyTypeId INTEGER NOT NULL,
                     tourneyNo INTEGER NOT NULL,
                     entries INTEGER,
-                    prizePool REAL,
+                    prizePool <money>,
                     startTime TEXT NOT NULL,
                     rank INTEGER,
-                    winnings REAL,
-                    bounties REAL NOT NULL,
+                    winnings <money>,
+                    bounties <money> NOT NULL,
                     FOREIGN KEY (tourneyTypeId) REFERENCES TourneyTypes (id))"""
 
         ####################################
@@ -109,16 +125,16 @@ class Sql(object):
                     id INTEGER PRIMARY KEY NOT NULL,
                     handId INTEGER NOT NULL,
                     playerId INTEGER NOT NULL,
-                    startStack REAL NOT NULL,
-                    startBounty REAL,
-                    endBounty REAL,
+                    startStack <money> NOT NULL,
+                    startBounty <money>,
+                    endBounty <money>,
                     position TEXT NOT NULL,
                     seatNo INTEGER NOT NULL,
                     card1 TEXT,
                     card2 TEXT,
                     startingHand TEXT,
-                    winnings REAL NOT NULL,
-                    totalProfit REAL NOT NULL,
+                    winnings <money> NOT NULL,
+                    totalProfit <money> NOT NULL,
                     street0VPIChance INTEGER NOT NULL,
                     street0VPI INTEGER NOT NULL,
                     street0AggrChance INTEGER NOT NULL,
@@ -171,6 +187,9 @@ class Sql(object):
                     FOREIGN KEY (handId) REFERENCES Hands (id),
                     FOREIGN KEY (playerId) REFERENCES Players (id))"""
 
+        # The type of startStack tells if the money columns are INTEGER or REAL, see Database.integer_money
+        self.query["getHandPlayersColumns"] = "PRAGMA table_info(HandPlayers)"
+
         ####################################
         # Create HandActions
         ####################################
@@ -181,7 +200,7 @@ class Sql(object):
                     playerId INTEGER NOT NULL,
                     street TEXT NOT NULL,
                     action TEXT NOT NULL,
-                    amount REAL NOT NULL,
+                    amount <money> NOT NULL,
                     allIn INTEGER NOT NULL,
                     FOREIGN KEY (handId) REFERENCES Hands (id),
                     FOREIGN KEY (playerId) REFERENCES Players (id))"""
@@ -248,6 +267,30 @@ class Sql(object):
                     FOREIGN KEY (gameTypeId) REFERENCES GameTypes (id),
                     FOREIGN KEY (playerId) REFERENCES Players (id))"""
 
+        ####################################
+        # Create PendingSummaries
+        ####################################
+
+        # Summaries read before the hands of their tourney, applied when the tourney is created
+        self.query["createPendingSummariesTable"] = """CREATE TABLE PendingSummaries (
+                    tourneyNo INTEGER PRIMARY KEY NOT NULL,
+                    entries INTEGER,
+                    prizePool <money>,
+                    startTime TEXT NOT NULL,
+                    rank INTEGER,
+                    winnings <money>,
+                    fileId INTEGER NOT NULL,
+                    FOREIGN KEY (fileId) REFERENCES Files (id))"""
+
+        ####################################
+        # Create BulkLoads
+        ####################################
+
+        # Marker of a running bulk-load, the process which dropped UK_Hands and UK_HandPlayers and when
+        self.query["createBulkLoadsTable"] = """CREATE TABLE BulkLoads (
+                    pid INTEGER NOT NULL,
+                    startTime REAL NOT NULL)"""
+
         ####################################
         # Create Indexes
         ####################################
@@ -255,9 +298,11 @@ class Sql(object):
         self.query["createFilesIndex"] = "CREATE UNIQUE INDEX UK_Files ON Files (file)"
         self.query["createPlayersIndex"] = "CREATE UNIQUE INDEX UK_Players ON Players (name)"
         self.query["createTourneysIndex"] = "CREATE UNIQUE INDEX UK_Tourneys ON Tourneys (tourneyNo)"
-        self.query["createHandsIndex"] = "CREATE UNIQUE INDEX UK_Hands ON Hands (handNo)"
-        self.query["createHandPlayersIndex"] = "CREATE UNIQUE INDEX UK_HandPlayers ON HandPlayers (handId, playerId)"
+        self.query["createHandsIndex"] = "CREATE UNIQUE INDEX IF NOT EXISTS UK_Hands ON Hands (handNo)"
+        self.query["createHandPlayersIndex"] = "CREATE UNIQUE INDEX IF NOT EXISTS UK_HandPlayers ON HandPlayers (handId, playerId)"
         self.query["createHudCacheIndex"] = "CREATE UNIQUE INDEX UK_HudCache ON HudCache (gameTypeId, playerId, seats)"
+        self.query["dropHandsIndex"] = "DROP INDEX IF EXISTS UK_Hands"
+        self.query["dropHandPlayersIndex"] = "DROP INDEX IF EXISTS UK_HandPlayers"
 
         ####################################
         # Counts for DB stats window
@@ -271,7 +316,7 @@ class Sql(object):
         # Queries for Files table
         ####################################
 
-        self.query["getFileId"] = "SELECT id FROM Files WHERE file = ?"
+        self.query["getFile"] = "SELECT id, byteOffset, fileSize, fileMtime, prefixHash FROM Files WHERE file = ?"
 
         self.query["insertFile"] = """INSERT INTO Files (file, startTime, hands, stored, duplicates, errors, finished)
                                       VALUES (?, ?, ?, ?, ?, ?, ?)"""
@@ -282,7 +327,11 @@ class Sql(object):
                                           stored = stored + ?,
                                           duplicates = duplicates + ?,
                                           errors = errors + ?,
-                                          finished = ?
+                                          finished = ?,
+                                          byteOffset = ?,
+                                          fileSize = ?,
+                                          fileMtime = ?,
+                                          prefixHash = ?
                                       WHERE id = ?"""
 
         ####################################
@@ -295,6 +344,8 @@ class Sql(object):
 
         self.query["insertGameType"] = "INSERT INTO GameTypes (type, currency, smallBlind, bigBlind, maxSeats, ante) VALUES (?, ?, ?, ?, ?, ?)"
 
+        self.query["getGameTypesCache"] = "SELECT type, currency, smallBlind, bigBlind, maxSeats, ante, id FROM GameTypes ORDER BY id DESC LIMIT ?"
+
         ####################################
         # Queries for Players table
         ####################################
@@ -303,6 +354,8 @@ class Sql(object):
 
         self.query["insertPlayer"] = "INSERT INTO Players (name, hero) VALUES (?, ?)"
 
+        self.query["getPlayersCache"] = "SELECT name, id FROM Players ORDER BY id DESC LIMIT ?"
+
         ####################################
         # Queries for TourneyTypes table
         ####################################
@@ -332,6 +385,10 @@ class Sql(object):
 
         self.query["getTourneyId"] = "SELECT id FROM Tourneys WHERE tourneyNo = ?"
 
+        self.query["getTourneyIds"] = "SELECT tourneyNo, id FROM Tourneys WHERE tourneyNo IN (<tourneyNos>)"
+
+        self.query["getTourneysCache"] = "SELECT tourneyNo, id FROM Tourneys ORDER BY id DESC LIMIT ?"
+
         self.query["insertTourney"] = """INSERT INTO Tourneys (tourneyTypeId, tourneyNo, entries, prizePool, startTime, rank, winnings, bounties)
                                          VALUES (?, ?, ?, ?, ?, ?, ?, ?)"""
 
@@ -339,11 +396,36 @@ class Sql(object):
 
         self.query["updateTourneyBounties"] = "UPDATE Tourneys SET bounties = bounties + ? WHERE id = ?"
 
+        ####################################
+        # Queries for PendingSummaries table
+        ####################################
+
+        self.query["getPendingSummary"] = "SELECT entries, prizePool, startTime, rank, winnings FROM PendingSummaries WHERE tourneyNo = ?"
+
+        self.query["insertPendingSummary"] = """INSERT OR REPLACE INTO PendingSummaries (tourneyNo, entries, prizePool, startTime, rank, winnings, fileId)
+                                                VALUES (?, ?, ?, ?, ?, ?, ?)"""
+
+        self.query["deletePendingSummary"] = "DELETE FROM PendingSummaries WHERE tourneyNo = ?"
+
+        ####################################
+        # Queries for BulkLoads table
+        ####################################
+
+        self.query["getBulkLoad"] = "SELECT pid, startTime FROM BulkLoads"
+
+        self.query["insertBulkLoad"] = "INSERT INTO BulkLoads (pid, startTime) VALUES (?, ?)"
+
+        self.query["deleteBulkLoads"] = "DELETE FROM BulkLoads"
+
         ####################################
         # Queries for Hands table
         ####################################
 
-        self.query["getHandId"] = "SELECT id FROM Hands WHERE handNo = ?"
+        self.query["getHandNos"] = "SELECT handNo FROM Hands WHERE handNo IN (<handNos>)"
+
+        self.query["getAllHandNos"] = "SELECT handNo FROM Hands"
+
+        self.query["getDuplicateHandNos"] = "SELECT handNo FROM Hands GROUP BY handNo HAVING COUNT(*) > 1"
 
         self.query["insertHand"] = """INSERT INTO Hands (tableName, handNo, tourneyId, gameTypeId, fileId, startTime,
                                                          seats, heroSeat, boardCard1, boardCard2, boardCard3, boardCard4,
@@ -394,13 +476,7 @@ class Sql(object):
         # Queries for HudCache table
         ####################################
 
-        self.query["getHudCacheId"] = """SELECT id
-                                         FROM HudCache
-                                         WHERE gameTypeId = ?
-                                         AND playerId = ?
-                                         AND seats = ?"""
-
-        self.query["insertHudCache"] = """INSERT INTO HudCache (gameTypeId, playerId, seats, n, street0VPIChance, street0VPI,
+        self.query["upsertHudCache"] = """INSERT INTO HudCache (gameTypeId, playerId, seats, n, street0VPIChance, street0VPI,
                                                                 street0AggrChance, street0Aggr, street0TBChance, street0TBDone, street0FBChance, street0FBDone,
                                                                 street0FoldTo3BChance, street0FoldTo3BDone, street0FoldTo4BChance, street0FoldTo4BDone, raiseToStealChance, raiseToStealDone,
                                                                 stealChance, stealDone, street1Seen, street2Seen, street3Seen, sawShowdown,
@@ -410,60 +486,58 @@ class Sql(object):
                                                                 foldToStreet1CBDone, foldToStreet2CBChance, foldToStreet2CBDone, foldToStreet3CBChance, foldToStreet3CBDone, street1CheckRaiseChance,
                                                                 street1CheckRaiseDone, street2CheckRaiseChance, street2CheckRaiseDone, street3CheckRaiseChance, street3CheckRaiseDone)
                                           VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?,
-                                                  ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"""
-
-        self.query["updateHudCache"] = """UPDATE HudCache
-                                          SET n = n + ?,
-                                              street0VPIChance = street0VPIChance + ?,
-                                              street0VPI = street0VPI + ?,
-                                              street0AggrChance = street0AggrChance + ?,
-                                              street0Aggr = street0Aggr + ?,
-                                              street0TBChance = street0TBChance + ?,
-                                              street0TBDone = street0TBDone + ?,
-                                              street0FBChance = street0FBChance + ?,
-                                              street0FBDone = street0FBDone + ?,
-                                              street0FoldTo3BChance = street0FoldTo3BChance + ?,
-                                              street0FoldTo3BDone = street0FoldTo3BDone + ?,
-                                              street0FoldTo4BChance = street0FoldTo4BChance + ?,
-                                              street0FoldTo4BDone = street0FoldTo4BDone + ?,
-                                              raiseToStealChance = raiseToStealChance + ?,
-                                              raiseToStealDone = raiseToStealDone + ?,
-                                              stealChance = stealChance + ?,
-                                              stealDone = stealDone + ?,
-                                              street1Seen = street1Seen + ?,
-                                              street2Seen = street2Seen + ?,
-                                              street3Seen = street3Seen + ?,
-                                              sawShowdown = sawShowdown + ?,
-                                              otherRaisedStreet1 = otherRaisedStreet1 + ?,
-                                              otherRaisedStreet2 = otherRaisedStreet2 + ?,
-                                              otherRaisedStreet3 = otherRaisedStreet3 + ?,
-                                              foldToOtherRaisedStreet1 = foldToOtherRaisedStreet1 + ?,
-                                              foldToOtherRaisedStreet2 = foldToOtherRaisedStreet2 + ?,
-                                              foldToOtherRaisedStreet3 = foldToOtherRaisedStreet3 + ?,
-                                              wonWhenSeenStreet1 = wonWhenSeenStreet1 + ?,
-                                              foldBBToStealChance = foldBBToStealChance + ?,
-                                              foldedBBToSteal = foldedBBToSteal + ?,
-                                              foldSBToStealChance = foldSBToStealChance + ?,
-                                              foldedSBToSteal = foldedSBToSteal + ?,
-                                              street1CBChance = street1CBChance + ?,
-                                              street1CBDone = street1CBDone + ?,
-                                              street2CBChance = street2CBChance + ?,
-                                              street2CBDone = street2CBDone + ?,
-                                              street3CBChance = street3CBChance + ?,
-                                              street3CBDone = street3CBDone + ?,
-                                              foldToStreet1CBChance = foldToStreet1CBChance + ?,
-                                              foldToStreet1CBDone = foldToStreet1CBDone + ?,
-                                              foldToStreet2CBChance = foldToStreet2CBChance + ?,
-                                              foldToStreet2CBDone = foldToStreet2CBDone + ?,
-                                              foldToStreet3CBChance = foldToStreet3CBChance + ?,
-                                              foldToStreet3CBDone = foldToStreet3CBDone + ?,
-                                              street1CheckRaiseChance = street1CheckRaiseChance + ?,
-                                              street1CheckRaiseDone = street1CheckRaiseDone + ?,
-                                              street2CheckRaiseChance = street2CheckRaiseChance + ?,
-                                              street2CheckRaiseDone = street2CheckRaiseDone + ?,
-                                              street3CheckRaiseChance = street3CheckRaiseChance + ?,
-                                              street3CheckRaiseDone = street3CheckRaiseDone + ?
-                                          WHERE id = ?"""
+                                                  ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                                          ON CONFLICT (gameTypeId, playerId, seats) DO UPDATE
+                                          SET n = n + excluded.n,
+                                              street0VPIChance = street0VPIChance + excluded.street0VPIChance,
+                                              street0VPI = street0VPI + excluded.street0VPI,
+                                              street0AggrChance = street0AggrChance + excluded.street0AggrChance,
+                                              street0Aggr = street0Aggr + excluded.street0Aggr,
+                                              street0TBChance = street0TBChance + excluded.street0TBChance,
+                                              street0TBDone = street0TBDone + excluded.street0TBDone,
+                                              street0FBChance = street0FBChance + excluded.street0FBChance,
+                                              street0FBDone = street0FBDone + excluded.street0FBDone,
+                                              street0FoldTo3BChance = street0FoldTo3BChance + excluded.street0FoldTo3BChance,
+                                              street0FoldTo3BDone = street0FoldTo3BDone + excluded.street0FoldTo3BDone,
+                                              street0FoldTo4BChance = street0FoldTo4BChance + excluded.street0FoldTo4BChance,
+                                              street0FoldTo4BDone = street0FoldTo4BDone + excluded.street0FoldTo4BDone,
+                                              raiseToStealChance = raiseToStealChance + excluded.raiseToStealChance,
+                                              raiseToStealDone = raiseToStealDone + excluded.raiseToStealDone,
+                                              stealChance = stealChance + excluded.stealChance,
+                                              stealDone = stealDone + excluded.stealDone,
+                                              street1Seen = street1Seen + excluded.street1Seen,
+                                              street2Seen = street2Seen + excluded.street2Seen,
+                                              street3Seen = street3Seen + excluded.street3Seen,
+                                              sawShowdown = sawShowdown + excluded.sawShowdown,
+                                              otherRaisedStreet1 = otherRaisedStreet1 + excluded.otherRaisedStreet1,
+                                              otherRaisedStreet2 = otherRaisedStreet2 + excluded.otherRaisedStreet2,
+                                              otherRaisedStreet3 = otherRaisedStreet3 + excluded.otherRaisedStreet3,
+                                              foldToOtherRaisedStreet1 = foldToOtherRaisedStreet1 + excluded.foldToOtherRaisedStreet1,
+                                              foldToOtherRaisedStreet2 = foldToOtherRaisedStreet2 + excluded.foldToOtherRaisedStreet2,
+                                              foldToOtherRaisedStreet3 = foldToOtherRaisedStreet3 + excluded.foldToOtherRaisedStreet3,
+                                              wonWhenSeenStreet1 = wonWhenSeenStreet1 + excluded.wonWhenSeenStreet1,
+                                              foldBBToStealChance = foldBBToStealChance + excluded.foldBBToStealChance,
+                                              foldedBBToSteal = foldedBBToSteal + excluded.foldedBBToSteal,
+                                              foldSBToStealChance = foldSBToStealChance + excluded.foldSBToStealChance,
+                                              foldedSBToSteal = foldedSBToSteal + excluded.foldedSBToSteal,
+                                              street1CBChance = street1CBChance + excluded.street1CBChance,
+                                              street1CBDone = street1CBDone + excluded.street1CBDone,
+                                              street2CBChance = street2CBChance + excluded.street2CBChance,
+                                              street2CBDone = street2CBDone + excluded.street2CBDone,
+                                              street3CBChance = street3CBChance + excluded.street3CBChance,
+                                              street3CBDone = street3CBDone + excluded.street3CBDone,
+                                              foldToStreet1CBChance = foldToStreet1CBChance + excluded.foldToStreet1CBChance,
+                                              foldToStreet1CBDone = foldToStreet1CBDone + excluded.foldToStreet1CBDone,
+                                              foldToStreet2CBChance = foldToStreet2CBChance + excluded.foldToStreet2CBChance,
+                                              foldToStreet2CBDone = foldToStreet2CBDone + excluded.foldToStreet2CBDone,
+                                              foldToStreet3CBChance = foldToStreet3CBChance + excluded.foldToStreet3CBChance,
+                                              foldToStreet3CBDone = foldToStreet3CBDone + excluded.foldToStreet3CBDone,
+                                              street1CheckRaiseChance = street1CheckRaiseChance + excluded.street1CheckRaiseChance,
+                                              street1CheckRaiseDone = street1CheckRaiseDone + excluded.street1CheckRaiseDone,
+                                              street2CheckRaiseChance = street2CheckRaiseChance + excluded.street2CheckRaiseChance,
+                                              street2CheckRaiseDone = street2CheckRaiseDone + excluded.street2CheckRaiseDone,
+                                              street3CheckRaiseChance = street3CheckRaiseChance + excluded.street3CheckRaiseChance,
+                                              street3CheckRaiseDone = street3CheckRaiseDone + excluded.street3CheckRaiseDone"""
 
         self.query["getHudStats"] = """SELECT hc.playerId                       AS player_id,
                                               p.name                            AS screen_name,
@@ -544,8 +618,8 @@ class Sql(object):
         # Queries for Tourney Stats
         ####################################
 
-        self.query["getTourneyDetailedStats"] = """SELECT printf("%.2f", tt.buyIn)                                                                                       AS buyIn,
-                                                          printf("%.2f", tt.fee)                                                                                         AS fee,
+        self.query["getTourneyDetailedStats"] = """SELECT printf("%.2f", tt.buyIn / <moneyUnit>)                                                                         AS buyIn,
+                                                          printf("%.2f", tt.fee / <moneyUnit>)                                                                           AS fee,
                                                           printf("%d", tt.maxSeats)                                                                                      AS maxSeats,
 					                               	      IIF(tt.sng = 1, 'Yes', 'No')                                                                                   AS sng,
 					                               	      IIF(tt.knockout = 1, 'Yes', 'No')                                                                              AS knockout,
@@ -559,11 +633,11 @@ class Sql(object):
                                                           printf("%d", SUM(CASE WHEN t.rank = 5 THEN 1 ELSE 0 END))                                                      AS fifth,
                                                           printf("%d", SUM(CASE WHEN t.rank = 6 THEN 1 ELSE 0 END))                                                      AS sixth,
                                                           printf("%d", SUM(CASE WHEN t.rank > 0 THEN 0 ELSE 1 END))                                                      AS unknown,
-                                                          printf("%.2f", SUM(tt.buyIn + tt.fee))                                                                         AS spent,
-                                                          printf("%.2f", SUM(COALESCE(t.winnings, 0) + t.bounties))                                                      AS won,
-                                                          printf("%.2f", SUM(COALESCE(t.winnings, 0) + t.bounties - tt.buyIn - tt.fee))                                  AS net,
-														  printf("%.2f", (SUM(COALESCE(t.winnings, 0) + t.bounties - tt.buyIn - tt.fee) / SUM(tt.buyIn + tt.fee)) * 100) AS roi,
-														  printf("%.2f", SUM(COALESCE(t.winnings, 0) + t.bounties - tt.buyIn - tt.fee) / COUNT(1))                       AS profitPerTourney
+                                                          printf("%.2f", SUM(tt.buyIn + tt.fee) / <moneyUnit>)                                                           AS spent,
+                                                          printf("%.2f", SUM(COALESCE(t.winnings, 0) + t.bounties) / <moneyUnit>)                                        AS won,
+                                                          printf("%.2f", SUM(COALESCE(t.winnings, 0) + t.bounties - tt.buyIn - tt.fee) / <moneyUnit>)                    AS net,
+														  printf("%.2f", (CAST(SUM(COALESCE(t.winnings, 0) + t.bounties - tt.buyIn - tt.fee) AS REAL) / SUM(tt.buyIn + tt.fee)) * 100) AS roi,
+														  printf("%.2f", SUM(COALESCE(t.winnings, 0) + t.bounties - tt.buyIn - tt.fee) / <moneyUnit> / COUNT(1))         AS profitPerTourney
                                                    FROM Tourneys t
                                                    INNER JOIN TourneyTypes tt
                                                    ON tt.Id = t.tourneyTypeId
@@ -572,7 +646,7 @@ class Sql(object):
                                                    GROUP BY t.tourneyTypeId
                                                    ORDER BY tt.sng DESC, tt.buyIn, tt.fee, tt.maxSeats, tt.knockout"""
 
-        self.query["getTourneyGraphStats"] = """SELECT printf("%.2f", COALESCE(t.winnings, 0) + t.bounties - tt.buyIn - tt.fee)
+        self.query["getTourneyGraphStats"] = """SELECT printf("%.2f", (COALESCE(t.winnings, 0) + t.bounties - tt.buyIn - tt.fee) / <moneyUnit>)
                                                 FROM Tourneys t
                                                 INNER JOIN TourneyTypes tt
                                                 ON tt.id = t.tourneyTypeId
@@ -585,7 +659,7 @@ class Sql(object):
         # Queries for Cash Stats
         ####################################
 
-        self.query["getCashDetailedStats"] = """SELECT printf("%.2f/%.2f", gt.smallBlind, gt.bigBlind)                                                                                                          AS stakes,
+        self.query["getCashDetailedStats"] = """SELECT printf("%.2f/%.2f", gt.smallBlind / <moneyUnit>, gt.bigBlind / <moneyUnit>)                                                                              AS stakes,
                                                        printf("%d", COUNT(1))                                                                                                                                   AS handCount,
                                                        CASE WHEN SUM(hp.street0VPIChance) = 0 THEN NULL ELSE printf("%.1f", (CAST(SUM(hp.street0VPI) AS REAL) / SUM(hp.street0VPIChance)) * 100) END            AS vpip,
                                                        CASE WHEN SUM(hp.street0AggrChance) = 0 THEN NULL ELSE printf("%.1f", (CAST(SUM(hp.street0Aggr) AS REAL) / SUM(hp.street0AggrChance)) * 100) END         AS pfr,
@@ -597,7 +671,7 @@ class Sql(object):
                                                        CASE WHEN SUM(hp.raiseToStealChance) = 0 THEN NULL ELSE printf("%.1f", (CAST(SUM(hp.raiseToStealDone) AS REAL) / SUM(hp.raiseToStealChance)) * 100) END  AS rts,
                                                        CASE WHEN SUM(hp.street1Seen) = 0 THEN NULL ELSE printf("%.1f", (CAST(SUM(hp.sawShowdown) AS REAL) / SUM(hp.street1Seen)) * 100) END                     AS wtsd,
                                                        CASE WHEN SUM(hp.street1Seen) = 0 THEN NULL ELSE printf("%.1f", (CAST(SUM(hp.wonWhenSeenStreet1) AS REAL) / SUM(hp.street1Seen)) * 100) END              AS wwsf,
-                                                       printf("%.2f", SUM(hp.totalProfit))                                                                                                                      AS net,
+                                                       printf("%.2f", SUM(hp.totalProfit) / <moneyUnit>)                                                                                                        AS net,
                                                        printf("%.2f", (AVG(hp.totalProfit) / gt.bigBlind) * 100)                                                                                                AS bb100
                                                 FROM Hands h
                                                 INNER JOIN GameTypes gt
@@ -624,7 +698,7 @@ class Sql(object):
                                                             CASE WHEN SUM(hp.raiseToStealChance) = 0 THEN NULL ELSE printf("%.1f", (CAST(SUM(hp.raiseToStealDone) AS REAL) / SUM(hp.raiseToStealChance)) * 100) END  AS rts,
                                                             CASE WHEN SUM(hp.street1Seen) = 0 THEN NULL ELSE printf("%.1f", (CAST(SUM(hp.sawShowdown) AS REAL) / SUM(hp.street1Seen)) * 100) END                     AS wtsd,
                                                             CASE WHEN SUM(hp.street1Seen) = 0 THEN NULL ELSE printf("%.1f", (CAST(SUM(hp.wonWhenSeenStreet1) AS REAL) / SUM(hp.street1Seen)) * 100) END              AS wwsf,
-                                                            printf("%.2f", SUM(hp.totalProfit))                                                                                                                      AS net
+                                                            printf("%.2f", SUM(hp.totalProfit) / <moneyUnit>)                                                                                                        AS net
                                                      FROM Hands h
                                                      INNER JOIN GameTypes gt
                                                      ON gt.id = h.gameTypeId
@@ -637,7 +711,7 @@ class Sql(object):
                                                      AND (<stakes>)
                                                      GROUP BY hp.startingHand"""
 
-        self.query["getCashGraphStats"] = """SELECT printf("%.2f", hp.totalProfit)
+        self.query["getCashGraphStats"] = """SELECT printf("%.2f", hp.totalProfit / <moneyUnit>)
                                              FROM Hands h
                                              INNER JOIN GameTypes gt
                                              ON gt.id = h.gameTypeId
@@ -652,7 +726,7 @@ class Sql(object):
 
         self.query["getCashSessionStats"] = """SELECT h.startTime,
                                                       strftime('%s', replace(h.startTime, '/', '-')),
-                                                      printf("%.2f", hp.totalProfit)
+                                                      printf("%.2f", hp.totalProfit / <moneyUnit>)
                                                FROM Hands h
                                                INNER JOIN GameTypes gt
                                                ON gt.id = h.gameTypeId
@@ -14,17 +14,21 @@ $PYINSTALLER_OPTIONS = "--noconfirm --onedir --windowed --log-level=DEBUG"
 # List of all files
 $FILES = @(
     "Aux_Hud.py",
+    "Archives.py",
     "Configuration.py",
     "Database.py",
     "DerivedStats.py",
+    "DirectoryWatcher.py",
     "Exceptions.py",
     "Filters.py",
     "fpdb.pyw",
+    "fpdb_import.py",
     "GuiAutoImport.py",
     "GuiBulkImport.py",
     "GuiCashGraphViewer.py",
     "GuiCashPlayerStats.py",
     "GuiCashSessionViewer.py",
+    "GuiImportProgress.py",
     "GuiTourneyGraphViewer.py",
     "GuiTourneyPlayerStats.py",
     "Hand.py",
@@ -0,0 +1,139 @@
+import argparse
+import logging
+import os
+import random
+import sys
+
+import Database
+import DerivedStats
+from Exceptions import FpdbParseError
+import PokerStarsToFpdb
+
+# Compares DerivedStats.calc_stats with the reference implementation (calc_stats_reference):
+#   python check_derived_stats.py [<directory or file> ...] [--random N] [--seed S]
+# The hand histories are parsed and the stats of each hand computed both ways, --random adds N hands
+# with generated action sequences. Exits with 1 when a stat differs
+
+STREETS = ["ANTES", "PREFLOP", "FLOP", "TURN", "RIVER"]
+ACTIONS = ["folds", "checks", "calls", "raises", "bets"]
+
+class RandomHand(object):
+    # The attributes of a Hand the stats are computed from
+    def __init__(self, rng):
+        names = [f"Player {i}" for i in range(rng.randint(2, 9))]
+
+        self.action_streets = STREETS
+        self.players = [[i + 1, name, "100", None, None] for i, name in enumerate(names)]
+        self.actions = {street: [] for street in STREETS}
+        self.hand_players = {}
+
+        # Mostly the positions of a full table, sometimes any position
+        if rng.random() < 0.8:
+            self.positions = list(range(len(names) - 2))[::-1] + ["S", "B"]
+        else:
+            self.positions = [rng.choice([0, 1, 2, 5, "S", "B"]) for _ in names]
+
+        # Blinds and the usual actions, sometimes blinds posted anywhere
+        if rng.random() < 0.6:
+            actions = ACTIONS
+            self.actions["PREFLOP"] += [(names[-2], "small blind", 1, False), (names[-1], "big blind", 2, rng.random() < 0.05)]
+        else:
+            actions = ACTIONS + ["small blind", "big blind"]
+
+        for street in STREETS[1:]:
+            if street != "PREFLOP" and rng.random() < 0.25:
+                continue
+
+            for _ in range(rng.randint(0, 14)):
+                name, act = rng.choice(names), rng.choice(actions)
+
+                if act in ("folds", "checks"):
+                    self.actions[street].append((name, act))
+                elif act == "raises":
+                    self.actions[street].append((name, act, 2, 4, 2, rng.random() < 0.1))
+                else:
+                    self.actions[street].append((name, act, 2, rng.random() < 0.1))
+
+    def set_positions(self):
+        for player, position in zip(self.players, self.positions):
+            self.hand_players[player[1]].position = position
+
+def compute(hand, calc):
+    # HandPlayers rows of the players with the stats calc fills, the other columns are left at their defaults
+    hand.hand_players = {}
+
+    for player in hand.players:
+        hand.hand_players[player[1]] = DerivedStats.PlayerStats()
+
+    hand.set_positions()
+    calc(hand)
+
+    return {name: Database.get_hand_players_row(player_stats) for name, player_stats in hand.hand_players.items()}
+
+def compare(hand, label):
+    # Prints the stats which differ, returns False then
+    expected = compute(hand, DerivedStats.calc_stats_reference)
+    result = compute(hand, DerivedStats.calc_stats)
+
+    if result == expected:
+        return True
+
+    print(f"{label}: {hand.actions}")
+
+    for name in expected:
+        for key, value, other in zip(Database.HAND_PLAYERS_KEYS, expected[name], result[name]):
+            if value != other:
+                print(f"  {name} {key}: reference {value}, calc_stats {other}")
+
+    return False
+
+def iter_hands(paths):
+    # Yields (file, hand) of the hand histories in paths, the hands which don't parse are skipped
+    for path in paths:
+        if os.path.isfile(path):
+            files = [path]
+        else:
+            files = sorted(os.path.join(root, name) for root, dirs, names in os.walk(path) for name in names if name.startswith("HH"))
+
+        for file in files:
+            with open(file, "rb") as file_reader:
+                for hand_texts, index in PokerStarsToFpdb.read_hand_batches(file_reader, 0):
+                    hhc = PokerStarsToFpdb.PokerStars(file, index, None, [])
+
+                    for hand_text in hand_texts:
+                        try:
+                            yield file, hhc.process_hand(hand_text)
+                        except FpdbParseError:
+                            pass
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare DerivedStats.calc_stats with the reference implementation")
+    parser.add_argument("paths", nargs="*", help="hand history directories or files")
+    parser.add_argument("--random", type=int, default=0, help="number of hands with generated actions")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the generated hands")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.CRITICAL)
+
+    hands, differ = 0, 0
+
+    for file, hand in iter_hands(args.paths):
+        hands += 1
+
+        if not compare(hand, f"{file} hand {hand.hand_no}"):
+            differ += 1
+
+    rng = random.Random(args.seed)
+
+    for i in range(args.random):
+        hands += 1
+
+        if not compare(RandomHand(rng), f"Random hand {i}"):
+            differ += 1
+
+    print(f"{hands} hands compared, {differ} differ")
+
+    return 1 if differ else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
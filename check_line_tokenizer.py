@@ -0,0 +1,134 @@
+import argparse
+import logging
+import os
+import random
+import re
+import sys
+
+import Database
+import PokerStarsToFpdb
+
+# Compares the hands parsed by read_lines (PokerStarsToFpdb.LINE_TOKENIZER = True) with the hands parsed
+# by the full text readers (LINE_TOKENIZER = False):
+#   python check_line_tokenizer.py <directory or file> ... [--names] [--seed S] [--integer-money]
+# With --names the player names of each hand are replaced with names which look like the text of the hand
+# history (actions, amounts, brackets, odd whitespace...) before it's parsed. Exits with 1 when a hand differs
+
+NAMES = ["x: folds", "to 5x", "and is all-in", "col collected", "Seat 9", "Dealt to x", "the man", "big", "12ab", "[x]",
+         "(1 in chips)", "\u20ac5", "Ivy:", 'a said, "b', "two  spaces", "Ann\u200dB", "is sitting out",
+         "posts small blind 1", "Uncalled bet (5)", "bets 10", "wins \u20ac1 for", "showed [Ah Kd]", "Table 'x' 9-max",
+         "Fr@nk", "Dave_9", "O'Brien", "Zo\u00eb", "\u674e\u96f7", "Mr. Pink", "-=X=-", "5,000", "J.J.", "semi;colon", "x y z",
+         "calls", "ALL IN", "pot", "Hero2", "a-b", "1.5", "\u20acuro", "w\u00fcrfel", "#1", "tilt!", "$$$", "100%"]
+# Not part of the parsed state: the text, the amount parsers, the street offsets which only the readers set
+SKIPPED_SLOTS = ("hand_text", "amount", "currency_amount", "streets", "player_exists_cache")
+RE_SEAT_NAME = re.compile(r"^Seat \d+: (.+?) \((?:\u20ac)?[.\d]+ in chips", re.MULTILINE)
+
+class CheckedParser(PokerStarsToFpdb.PokerStars):
+    # Counts the hands read_lines parses, the others fall back to the readers
+    def __init__(self, file, integer_money):
+        self.line_hands = 0
+
+        super().__init__(file, 0, None, [], integer_money)
+
+    def read_lines(self, hand):
+        done = super().read_lines(hand)
+        self.line_hands += done
+
+        return done
+
+def rename_players(hand_text, rng):
+    # Replaces the names of the seated players wherever they appear in the hand text
+    names = sorted(set(RE_SEAT_NAME.findall(hand_text)), key=len, reverse=True)
+
+    if not names or len(names) > len(NAMES):
+        return hand_text
+
+    new_names = dict(zip(names, rng.sample(NAMES, len(names))))
+    re_names = re.compile(r"(?<!\w)(?:%s)(?!\w)" % "|".join(re.escape(name) for name in names))
+
+    return re_names.sub(lambda m: new_names[m.group(0)], hand_text)
+
+def parse(hhc, hand_text, line_tokenizer):
+    # State of the hand parsed with or without read_lines, with the HandPlayers and HandActions rows
+    # parse_file builds. The name of the error when the hand isn't parsed
+    PokerStarsToFpdb.LINE_TOKENIZER = line_tokenizer
+
+    try:
+        hand = hhc.process_hand(hand_text)
+        hand.assemble_hand_players()
+        hand.assemble_hand_actions()
+    except Exception as e:
+        return type(e).__name__
+
+    state = {}
+
+    for cls in type(hand).__mro__:
+        for slot in getattr(cls, "__slots__", ()):
+            if slot not in SKIPPED_SLOTS:
+                state[slot] = getattr(hand, slot, None)
+
+    state["hand_players"] = {name: Database.get_hand_players_row(player_stats) for name, player_stats in hand.hand_players.items()}
+
+    return state
+
+def iter_hand_texts(paths):
+    # Yields (file, hand_text) of the hand histories in paths
+    for path in paths:
+        if os.path.isfile(path):
+            files = [path]
+        else:
+            files = sorted(os.path.join(root, name) for root, dirs, names in os.walk(path) for name in names if name.startswith("HH"))
+
+        for file in files:
+            with open(file, "rb") as file_reader:
+                for hand_texts, index in PokerStarsToFpdb.read_hand_batches(file_reader, 0):
+                    for hand_text in hand_texts:
+                        if hand_text.strip():
+                            yield file, hand_text
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the hands parsed with and without the line tokenizer")
+    parser.add_argument("paths", nargs="+", help="hand history directories or files")
+    parser.add_argument("--names", action="store_true", help="replace the player names with unusual ones")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the name replacement")
+    parser.add_argument("--integer-money", action="store_true", help="parse the amounts as integers")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.CRITICAL)
+
+    hhc = CheckedParser("check_line_tokenizer", args.integer_money)
+    rng = random.Random(args.seed)
+    hands, differ, errors = 0, 0, 0
+
+    for file, hand_text in iter_hand_texts(args.paths):
+        if args.names:
+            hand_text = rename_players(hand_text, rng)
+
+        hands += 1
+        result = parse(hhc, hand_text, True)
+        expected = parse(hhc, hand_text, False)
+
+        if result == expected:
+            errors += isinstance(result, str)
+            continue
+
+        differ += 1
+        first_line = hand_text.partition("\n")[0]
+        print(f"{file}: {first_line}")
+
+        if isinstance(result, str) or isinstance(expected, str):
+            print(f"  readers {expected if isinstance(expected, str) else 'parsed'}, read_lines {result if isinstance(result, str) else 'parsed'}")
+            continue
+
+        for key in expected:
+            if result[key] != expected[key]:
+                print(f"  {key}: readers {expected[key]}, read_lines {result[key]}")
+
+    PokerStarsToFpdb.LINE_TOKENIZER = True
+
+    print(f"{hands} hands compared, {differ} differ, {errors} failed both ways, {hhc.line_hands} parsed by read_lines")
+
+    return 1 if differ else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,12 +1,10 @@
-import Configuration
-
-Configuration.set_log_file("fpdb-log.txt")
-
 import codecs
 import logging
+import multiprocessing
 import os
 import sys
 
+import Configuration
 import Database
 from Exceptions import FpdbError
 import GuiAutoImport
@@ -223,6 +221,12 @@ class fpdb(QMainWindow):
             self.db.disconnect()
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support()  # bulk import parser processes in the exe build
+
+    # Only here, the parser processes import this module again when they're spawned
+    Configuration.set_log_file("fpdb-log.txt")
+    Configuration.set_metrics_file("fpdb-metrics.txt")
+
     from qt_material import apply_stylesheet
     app = QApplication([])
     apply_stylesheet(app, theme="dark_purple.xml")
@@ -0,0 +1,108 @@
+import argparse
+import logging
+import multiprocessing
+import os
+import sys
+from time import perf_counter
+
+import Configuration
+import Database
+from Exceptions import FpdbError
+import Importer
+import interlocks
+
+log = logging.getLogger("importer")
+
+# Command line bulk import, no window is opened:
+#   python fpdb_import.py <directory> [--workers N] [--bulk-load-max-hands N] [--db file] [--recreate]
+# Settings which are not given come from the import section of HUD_config.xml
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk import PokerStars hand histories and tournament summaries")
+    parser.add_argument("path", help="directory to import")
+    parser.add_argument("--workers", type=int, help="parser processes, 0 = one per cpu")
+    parser.add_argument("--bulk-load-max-hands", type=int, help="use bulk-load mode when the database holds fewer hands, 0 = never")
+    parser.add_argument("--db", help="database file to use instead of the configured one")
+    parser.add_argument("--recreate", action="store_true", help="recreate the tables before importing")
+    args = parser.parse_args()
+
+    config = Configuration.Config()
+
+    if config.file_error:
+        print(f"There is an error in your config file {config.file}")
+        return 1
+
+    if args.db:
+        config.db_path = os.path.abspath(args.db)
+        config.database = os.path.basename(config.db_path)
+
+    workers = config.imp.workers if args.workers is None else args.workers
+    bulk_load_max_hands = config.imp.bulk_load_max_hands if args.bulk_load_max_hands is None else args.bulk_load_max_hands
+
+    if not os.path.isdir(args.path):
+        print(f"'{args.path}' is not a directory")
+        return 1
+
+    # The lock of the fpdb importers, no other import, bulk-load or recreate runs at the same time
+    global_lock = interlocks.InterProcessLockWin32(name="fpdb_global_lock")
+
+    if not global_lock.acquire("fpdb_import"):
+        print("Import aborted - global lock not available, another import is running")
+        return 1
+
+    try:
+        return import_dir(config, args.path, args.recreate, workers, bulk_load_max_hands)
+    finally:
+        global_lock.release()
+
+def import_dir(config, path, recreate, workers, bulk_load_max_hands):
+    # Runs with the global lock taken
+    if recreate and not os.path.exists(config.db_path):
+        Configuration.check_dir(os.path.dirname(config.db_path))
+        open(config.db_path, "a").close()
+
+    try:
+        db = Database.Database(config)
+    except FpdbError as e:
+        print(f"Can't open the database: {e}")
+        return 1
+
+    if recreate:
+        db.recreate_tables()
+
+    importer = Importer.Importer(db)
+    importer.add_bulk_import_dir(path)
+
+    print(f"Importing {len(importer.file_list)} files from '{path}' into {config.db_path}")
+
+    start = perf_counter()
+
+    try:
+        stored, duplicates, errors = importer.run_import(workers, bulk_load_max_hands)
+    except FpdbError as e:
+        print(f"Import failed: {e}")
+        return 1
+
+    elapsed = perf_counter() - start
+
+    print(f"Stored: {stored}, Duplicates: {duplicates}, Errors: {errors}, {stored / elapsed if elapsed else 0:.1f} stored/sec")
+
+    for line in importer.get_metrics():
+        print(f"  {line}")
+
+    for stage in Importer.STAGES:
+        if stage in importer.stage_times:
+            print(f"  {stage:<10}{importer.stage_times[stage]:>10.2f}s")
+
+    log.info(f"Command line import of '{path}' done: Stored: {stored}, Duplicates: {duplicates}, Errors: {errors}, {elapsed:.2f}s")
+
+    return 0
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+
+    # Only here, the parser processes import this module again when they're spawned
+    Configuration.set_log_file("fpdb-import-log.txt")
+    Configuration.set_metrics_file("fpdb-metrics.txt")
+
+    sys.exit(main())
@@ -17,11 +17,23 @@ class InterProcessLockWin32(object):
         if self.has_lock:  # make sure 2nd acquire in same process fails
             return False
 
+        # The mutex is owned by the process which waited for it, in the other processes the wait times out
         self.mutex = win32event.CreateMutex(None, 0, self.get_hashed_name())
+
+        if win32event.WaitForSingleObject(self.mutex, 0) not in (win32event.WAIT_OBJECT_0, win32event.WAIT_ABANDONED):
+            self.mutex.Close()
+            self.mutex = None
+
+            return False
+
         self.has_lock = True
 
         return True
 
     def release(self):
+        if not self.has_lock:
+            return
+
+        win32event.ReleaseMutex(self.mutex)
         self.mutex.Close()
         self.has_lock = False